@@ -3,23 +3,25 @@
 import math
 import sys
 from argparse import ArgumentParser
+from time import perf_counter
 
 import cairo
 import pygame
 
 from helpfunctions import check_points_on_line, check_intersections
 from point import Point
-from earclipping_anim import EarClippingAnim
+from cache import TriangulationCache
 from drawing import rgba_to_bgra
 
 from examples import examples_dict
 
-def print_speed(speed, pause):
+def print_speed(speed, pause, frame_time=None):
     sys.stdout.write("\033[K")
+    frame = f", frame time: {frame_time:.1f} ms" if frame_time is not None else ""
     if pause: 
-        print(f"Current speed: PAUSED", end="\r")
+        print(f"Current speed: PAUSED{frame}", end="\r")
     else:
-        print(f"Current speed: {speed}", end="\r")
+        print(f"Current speed: {speed}{frame}", end="\r")
 
 def draw_points(ctx: cairo.Context, pts):
     ctx.set_line_width(2)
@@ -49,6 +51,18 @@ def draw_intesections(ctx: cairo.Context, pts):
         ctx.arc(p[0], p[1],5, 0, 2*math.pi)
         ctx.stroke()
 
+def draw_stats(ctx: cairo.Context, lines):
+    ctx.select_font_face("monospace")
+    ctx.set_font_size(11)
+    line_height = 13
+    ctx.set_source_rgba(*rgba_to_bgra(0, 0, 0, 0.6))
+    ctx.rectangle(4, 4, 200, line_height * len(lines) + 6)
+    ctx.fill()
+    ctx.set_source_rgba(*rgba_to_bgra(1, 1, 1, 1))
+    for i, line in enumerate(lines):
+        ctx.move_to(8, 4 + line_height * (i + 1))
+        ctx.show_text(line)
+
 def main():
     print("Instructions:")
     print("####################################################")
@@ -64,135 +78,206 @@ def main():
     print("LEFT  - run the animation backwards")
     print("RIGHT - run the animation forwards")
     print("SPACE - pause the animation")
+    print("[ ]   - jump to the previous/next step")
+    print("l     - switch between full and summarized animation")
+    print("i     - show/hide engine counters (needs --stats)")
     print("####################################################")
     parser = ArgumentParser()
     parser.add_argument("--width", type=int, default=512, help="The width of the application window.")
     parser.add_argument("--height", type=int, default=512, help="The height of the application window.")
+    parser.add_argument("--no-cache", action="store_true", help="Redraw all finished steps of the animation in every frame.")
+    parser.add_argument("--summary", action="store_true", help="Start with the summarized animation, ear clips are shown in batches.")
+    parser.add_argument("--summary-duration", type=float, default=60, help="Length of the summarized animation in seconds at speed 1.")
+    parser.add_argument("--stats", action="store_true", help="Collect counters and phase times of the engine and show them in an overlay.")
     args = parser.parse_args()
     
     width, height = args.width, args.height
+    cache_size = None if args.no_cache else (width, height)
     pygame.init()
     window = pygame.display.set_mode((width, height))
     clock = pygame.time.Clock()
 
-    time = 0.0
-    total_anim_lenght = 1.0
+    time = 0.0 # in the timeline units of the animation, a unit lasts a second at speed 1
     speed = 1.0
     speed_diff_update = 1.5
     max_speed = speed_diff_update ** 7
     min_speed = -max_speed
     time_direction = 1.0
     pause = False
+    # reloading an example reuses its animation
+    triangulations = TriangulationCache(max_size=32)
+    summary = args.summary
+    edge_swapping = False
+    show_stats = args.stats
 
     print_speed(speed, pause)
 
+    # the cairo surface and the pygame image share one buffer, both live for the whole run
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+    ctx = cairo.Context(surface)
+    ctx.set_antialias(cairo.Antialias(cairo.Antialias.GOOD))
+    image = pygame.image.frombuffer(surface.get_data(), (width, height), "RGBA")
+    screen = pygame.display.get_surface()
+
+    frame_time = None # smoothed render time of a frame in miliseconds
+    last_report = 0
+
     points_ready = False
     points = []
     intersections = []
+    dirty = True # the picture has to be rendered even if the time did not change
+    idle = False
     while True:
-        
+
+        # when nothing moves, sleep until an event comes instead of rendering the same frame
+        events = [pygame.event.wait()] + pygame.event.get() if idle else pygame.event.get()
+
         # set framerate, this call limits the framerate 
         # and returns number of miliseconds passed since the last call
         dt = clock.tick(60)
-        
-        # update time
-        if not pause:
-            time += dt * speed * time_direction / total_anim_lenght if (total_anim_lenght != 0) else 1.0
-        if time > 1.0: time = 1.0
-        if time < 0: time = 0
-
-
-        # render display
-        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
-
-        screen = pygame.display.get_surface()
+        if idle:
+            # the time spent waiting for an event does not move the animation
+            dt = 0
 
-        ctx = cairo.Context(surface)
-        ctx.set_antialias(cairo.Antialias(cairo.Antialias.GOOD))
-        
-        # fill the background
-        ctx.set_source_rgba(*rgba_to_bgra(0,0,0,1)) # corection of byte order
-        ctx.rectangle(0, 0, width, height)
-        ctx.fill()
-        
-        if not points_ready and points:
-            draw_points(ctx,points)
-            
-        if intersections:
-            draw_intesections(ctx,intersections)
-
-        ctx.set_line_width(2)
-        
-        
         # event handling
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
+                print(f"\nAnimation cache - {triangulations.stats}")
+                if args.stats and points_ready:
+                    print(f"Engine - {anim.stats}")
                 pygame.quit()
                 sys.exit(0)
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                dirty = True
+
             elif event.type == pygame.MOUSEBUTTONUP and not points_ready and not intersections:
                 pos = pygame.mouse.get_pos()
                 points.append(Point(pos[0],pos[1]))
+                dirty = True
 
-            elif event.type == pygame.KEYDOWN and event.key == pygame.K_f and not intersections and len(points)>=3:
+            elif event.type == pygame.KEYDOWN and event.key in (pygame.K_f, pygame.K_g) and not intersections and len(points)>=3:
                 points,_ = check_points_on_line(points)
                 intersections = check_intersections(points)
-                if not intersections:
+                # collinear cleanup may leave a degenerate polygon
+                if not intersections and len(points) >= 3:
                     points_ready = True
-                    anim = EarClippingAnim(points)
-                    total_anim_lenght = sum((t for _, t in anim.schedule)) * 1000
-                    time = 0.0
-
-            elif event.type == pygame.KEYDOWN and event.key == pygame.K_g and not intersections and len(points)>=3:
-                points,_ = check_points_on_line(points)
-                intersections = check_intersections(points)
-                if not intersections:
-                    points_ready = True
-                    anim = EarClippingAnim(points, edge_swapping=True)
-                    total_anim_lenght = sum((t for _, t in anim.schedule)) * 1000
+                    edge_swapping = event.key == pygame.K_g
+                    anim = triangulations.animation(points, edge_swapping=edge_swapping, cache_size=cache_size,
+                                                    summary=summary, target_duration=args.summary_duration,
+                                                    instrumented=args.stats)
                     time = 0.0
+                dirty = True
 
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_c:
                 points_ready = False
                 points = []
                 intersections=[]
+                dirty = True
             
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_UP:
                 speed *= speed_diff_update
                 if speed > max_speed: speed = max_speed
-                print_speed(time_direction * speed, pause)
+                print_speed(time_direction * speed, pause, frame_time)
 
 
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_DOWN:
                 speed /= speed_diff_update
                 if speed < min_speed: speed = min_speed
-                print_speed(time_direction * speed, pause)
+                print_speed(time_direction * speed, pause, frame_time)
 
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_LEFT:
                 time_direction = -1.0
-                print_speed(time_direction * speed, pause)
+                print_speed(time_direction * speed, pause, frame_time)
             
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_RIGHT:
                 time_direction = 1.0
-                print_speed(time_direction * speed, pause)
+                print_speed(time_direction * speed, pause, frame_time)
             
+            elif event.type == pygame.KEYDOWN and event.key in (pygame.K_LEFTBRACKET, pygame.K_RIGHTBRACKET) and points_ready:
+                index, _ = anim.timeline.locate_time(time)
+                if index is None:
+                    index = len(anim.timeline)
+                time = anim.timeline.seek_time(index + (1 if event.key == pygame.K_RIGHTBRACKET else -1))
+                dirty = True
+
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_l:
+                summary = not summary
+                if points_ready:
+                    # the steps of the two animations do not correspond, the new one starts from the beginning
+                    anim = triangulations.animation(points, edge_swapping=edge_swapping, cache_size=cache_size,
+                                                    summary=summary, target_duration=args.summary_duration,
+                                                    instrumented=args.stats)
+                    time = 0.0
+                    dirty = True
+
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_i:
+                if args.stats:
+                    show_stats = not show_stats
+                    dirty = True
+                else:
+                    print("\nrun the application with --stats to collect the counters")
+
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
                 pause = not pause
-                print_speed(time_direction * speed, pause)
+                print_speed(time_direction * speed, pause, frame_time)
                 
             elif event.type == pygame.KEYDOWN and (event.key >= ord('1') and event.key <=ord('7')):
                 intersections = []
                 example_id = event.key-ord('0')-1
                 points = (list(examples_dict.values()))[example_id]
+                dirty = True
+
+        # update time
+        previous_time = time
+        # the animation grows while it is played, the end is final once it is complete
+        end = anim.length if points_ready else 0.0
+        if not pause:
+            time += dt * speed * time_direction / 1000
+        if time > end: time = end
+        if time < 0: time = 0
+
+        # paused or clamped at 0 or 1 without input, the frame on the screen is still valid
+        if not dirty and not (points_ready and time != previous_time):
+            idle = not points_ready or pause or (time == end and anim.complete if time_direction > 0 else time == 0)
+            continue
+        idle = False
+        dirty = False
+
+        # render display
+        frame_start = perf_counter()
+        ctx.save()
+
+        # fill the background
+        ctx.set_source_rgba(*rgba_to_bgra(0,0,0,1)) # corection of byte order
+        ctx.rectangle(0, 0, width, height)
+        ctx.fill()
+        
+        if not points_ready and points:
+            draw_points(ctx,points)
+            
+        if intersections:
+            draw_intesections(ctx,intersections)
+
+        ctx.set_line_width(2)
 
         if points_ready:
-            anim(ctx, time)
+            anim.draw_at(ctx, time)
+            if show_stats:
+                draw_stats(ctx, anim.stats.lines())
+
+        ctx.restore()
+        surface.flush()
 
-        # Create PyGame surface from Cairo Surface
-        buf = surface.get_data()
-        image = pygame.image.frombuffer(buf, (width, height), "RGBA")
-        # Tranfer to Screen
+        # Tranfer to Screen, the image shares the buffer with the cairo surface
         screen.blit(image, (0, 0))
         pygame.display.flip()
 
+        elapsed = (perf_counter() - frame_start) * 1000
+        frame_time = elapsed if frame_time is None else 0.9 * frame_time + 0.1 * elapsed
+        now = pygame.time.get_ticks()
+        if now - last_report >= 500:
+            last_report = now
+            print_speed(time_direction * speed, pause, frame_time)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
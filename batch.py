@@ -0,0 +1,233 @@
+"""Headless batch triangulation of polygon files
+
+Usage:
+    python -m batch triangulate polygons.jsonl -o triangles.jsonl
+    cat footprints.wkt | python -m batch triangulate - --format wkt --workers 8
+    python -m batch pack footprints.wkt -o footprints.polybin
+    python -m batch triangulate footprints.polybin -o triangles.tribin
+    python -m batch triangulate coastline.wkt --split --workers 8
+"""
+
+import itertools
+import math
+import os
+import sys
+import time
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import point
+import polygonbin
+import polygonio
+import sweepline
+from cache import TriangulationCache
+from decomposition import triangulate_parallel
+from earclipping import ENGINES, triangulate_indices
+
+def check_finite(rings):
+    """Raises ValueError for infinite or NaN coordinates, the exact predicates cannot handle them"""
+    if not all(math.isfinite(c) for ring in rings for p in ring for c in p):
+        raise ValueError("the polygon has non-finite coordinates")
+
+_caches = dict() # caches opened in this process, key is the path
+
+def triangulate_record(record, edge_swapping=False, check=False, vectorized=False, cache_path=None, engine="earclipping"):
+    """Triangulates one (id, vertices, holes) record, returns (id, triangles, error),
+    triangles index the vertices followed by the vertices of the holes,
+    check tests every ring on its own, not intersections of the rings with each other,
+    cache_path is a triangulation cache file shared by all processes, the cache uses ear clipping,
+    engine is a name from earclipping.ENGINES, a polygonio.BadRecord gives its error"""
+    if isinstance(record, polygonio.BadRecord):
+        return record.id, None, record.error
+    polygon_id, vertices, holes = record
+    vertices = point.as_points(vertices)
+    holes = [point.as_points(hole) for hole in holes]
+    try:
+        check_finite([vertices, *holes])
+        if check and not all(sweepline.is_simple(ring) for ring in [vertices, *holes]):
+            raise ValueError("the polygon is not simple")
+        if cache_path is not None:
+            cache = _caches.get(cache_path)
+            if cache is None:
+                cache = _caches[cache_path] = TriangulationCache(path=cache_path, vectorized=vectorized)
+            return polygon_id, cache.triangulate_indices(vertices, edge_swapping=edge_swapping, holes=holes), None
+        return polygon_id, triangulate_indices(vertices, edge_swapping=edge_swapping, vectorized=vectorized, holes=holes,
+                                               engine=engine), None
+    except ValueError as e:
+        return polygon_id, None, str(e)
+
+def triangulate_chunk(records, edge_swapping=False, check=False, vectorized=False, cache_path=None, engine="earclipping"):
+    return [triangulate_record(record, edge_swapping, check, vectorized, cache_path, engine) for record in records]
+
+_datasets = dict() # datasets mapped in this process, key is the path
+
+def triangulate_dataset_chunk(path, start, stop, edge_swapping=False, check=False, vectorized=False, cache_path=None,
+                              engine="earclipping"):
+    """Triangulates records start..stop of a binary dataset mapped by the worker itself"""
+    dataset = _datasets.get(path)
+    if dataset is None:
+        dataset = _datasets[path] = polygonbin.Dataset(path)
+    return [triangulate_record((i, dataset[i], ()), edge_swapping, check, vectorized, cache_path, engine) for i in range(start, stop)]
+
+def chunked(iterable, size):
+    """Yields lists of at most size consecutive items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def triangulate_stream(records, workers=None, chunk_size=256, **options):
+    """Yields (id, triangles, error) for every record in the input order,
+    chunks of records are dispatched to a process pool, only a few chunks per worker
+    are in flight at once so the input is consumed lazily"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for record in records:
+            yield triangulate_record(record, **options)
+        return
+
+    tasks = ((triangulate_chunk, (chunk,)) for chunk in chunked(records, chunk_size))
+    yield from run_tasks(tasks, workers, options)
+
+def triangulate_dataset(path, workers=None, chunk_size=256, **options):
+    """Yields (index, triangles, error) for every polygon of a binary dataset,
+    workers map the file themselves, only index ranges are sent to them"""
+    count = len(polygonbin.Dataset(path))
+    workers = workers or os.cpu_count() or 1
+    tasks = ((triangulate_dataset_chunk, (path, start, min(start + chunk_size, count))) for start in range(0, count, chunk_size))
+    if workers == 1:
+        # chunk by chunk, so the results stream like with the pool
+        for func, args in tasks:
+            yield from func(*args, **options)
+        return
+
+    yield from run_tasks(tasks, workers, options)
+
+def triangulate_split(records, workers=None, edge_swapping=False, check=False, vectorized=False, engine="earclipping"):
+    """Yields (id, triangles, error) for every record, the polygons are triangulated one by one,
+    each of them split along diagonals into pieces triangulated on all workers, for a few huge polygons"""
+    for record in records:
+        if isinstance(record, polygonio.BadRecord):
+            yield record.id, None, record.error
+            continue
+        polygon_id, vertices, holes = record
+        vertices = point.as_points(vertices)
+        holes = [point.as_points(hole) for hole in holes]
+        try:
+            check_finite([vertices, *holes])
+            if check and not all(sweepline.is_simple(ring) for ring in [vertices, *holes]):
+                raise ValueError("the polygon is not simple")
+            triangles = triangulate_parallel(vertices, edge_swapping=edge_swapping, holes=holes, workers=workers, vectorized=vectorized,
+                                             engine=engine)
+        except ValueError as e:
+            yield polygon_id, None, str(e)
+            continue
+        yield polygon_id, triangles, None
+
+def run_tasks(tasks, workers, options):
+    """Runs (function, args) tasks in a process pool, yields their results in order,
+    only a few tasks per worker are in flight at once so the tasks are consumed lazily"""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for func, args in tasks:
+            pending.append(executor.submit(func, *args, **options))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def main():
+    parser = ArgumentParser(prog="python -m batch")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    tri = subparsers.add_parser("triangulate", help="Triangulate polygons, write triangle indices as JSON Lines.")
+    tri.add_argument("input", nargs="+", help="Input files, - for stdin.")
+    tri.add_argument("-o", "--output", default="-", help="Output file, stdout by default, a binary container if it ends with .tribin.")
+    tri.add_argument("--format", choices=polygonio.FORMATS, help="Input format, guessed from the extension by default.")
+    tri.add_argument("--edge-swapping", action="store_true", help="Improve the triangles by edge swapping.")
+    tri.add_argument("--check", action="store_true", help="Reject self-intersecting polygons before triangulation.")
+    tri.add_argument("--vectorized", action="store_true", help="Classify the vertices with NumPy, pays off for large polygons.")
+    tri.add_argument("--workers", type=int, default=None, help="Number of worker processes, all cores by default.")
+    tri.add_argument("--chunk-size", type=int, default=256, help="Number of polygons sent to a worker at once.")
+    tri.add_argument("--cache", default=None, help="Triangulation cache file, repeated polygons are looked up in it.")
+    tri.add_argument("--engine", choices=ENGINES, default="earclipping", help="Triangulation engine, auto picks by the polygon size.")
+    tri.add_argument("--split", action="store_true", help="Triangulate one polygon at a time on all workers by splitting it along diagonals.")
+
+    pack = subparsers.add_parser("pack", help="Convert polygon text files to a binary container.")
+    pack.add_argument("input", nargs="+", help="Input files, - for stdin.")
+    pack.add_argument("-o", "--output", required=True, help="Output file, conventionally with .polybin extension.")
+    pack.add_argument("--format", choices=polygonio.FORMATS, help="Input format, guessed from the extension by default.")
+    args = parser.parse_args()
+    if args.command == "triangulate" and args.split and args.cache:
+        parser.error("--split does not support --cache")
+    if args.command == "triangulate" and args.cache and args.engine != "earclipping":
+        parser.error("--cache supports only the earclipping engine")
+
+    def records(paths, errors="raise"):
+        for path in paths:
+            fmt = args.format or polygonio.guess_format(path)
+            file = polygonio.open_input(path)
+            try:
+                yield from polygonio.read_polygons(file, fmt, errors)
+            finally:
+                if file is not sys.stdin:
+                    file.close()
+
+    start = time.perf_counter()
+    count = 0
+    failed = 0
+    if args.command == "pack":
+        with polygonbin.DatasetWriter(args.output, polygonbin.POLYGONS) as writer:
+            for polygon_id, vertices, holes in records(args.input):
+                if holes:
+                    raise ValueError(f"polygon {polygon_id}: the binary container does not support holes")
+                writer.append(vertices)
+                count += 1
+        print(f"{count} polygons packed in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+        return
+
+    binary_inputs = [path for path in args.input if path.endswith(polygonbin.EXTENSIONS[polygonbin.POLYGONS])]
+    text_inputs = [path for path in args.input if path not in binary_inputs]
+    if args.split:
+        def dataset_records(path):
+            dataset = polygonbin.Dataset(path)
+            return ((i, dataset[i], ()) for i in range(len(dataset)))
+        # lines that cannot be read are written as failed records, the run goes on
+        results = triangulate_split(itertools.chain(*(dataset_records(path) for path in binary_inputs), records(text_inputs, "report")),
+                                    workers=args.workers, edge_swapping=args.edge_swapping, check=args.check, vectorized=args.vectorized,
+                                    engine=args.engine)
+    else:
+        options = dict(workers=args.workers, chunk_size=args.chunk_size,
+                       edge_swapping=args.edge_swapping, check=args.check, vectorized=args.vectorized, cache_path=args.cache,
+                       engine=args.engine)
+        results = itertools.chain(
+            *(triangulate_dataset(path, **options) for path in binary_inputs),
+            triangulate_stream(records(text_inputs, "report"), **options) if text_inputs else ())
+
+    if args.output.endswith(polygonbin.EXTENSIONS[polygonbin.TRIANGLES]):
+        # failed polygons are stored as records without triangles
+        with polygonbin.DatasetWriter(args.output, polygonbin.TRIANGLES) as writer:
+            for _, triangles, error in results:
+                writer.append(triangles if error is None else [])
+                count += 1
+                if error is not None:
+                    failed += 1
+    else:
+        output = polygonio.open_output(args.output)
+        for polygon_id, triangles, error in results:
+            polygonio.write_triangles(output, polygon_id, triangles, error)
+            count += 1
+            if error is not None:
+                failed += 1
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(f"{count} polygons ({failed} failed) in {elapsed:.2f} s, {rate:.1f} polygons/s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
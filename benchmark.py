@@ -0,0 +1,188 @@
+"""Benchmark of the stages of the triangulation on generated polygons
+
+Usage:
+    python benchmark.py --sizes 10 100 1000 10000 --json baseline.json
+    python benchmark.py --baseline baseline.json
+    python benchmark.py --sizes 100000 --parallel 1 2 4 8
+"""
+
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+
+from decomposition import triangulate_parallel
+from earclipping import EarClipping, triangulate
+from generators import GENERATORS
+from helpfunctions import check_intersections, check_points_on_line
+from monotone import MonotoneTriangulation
+
+# monotone is the whole triangulation by the monotone engine, to compare with classification and clipping
+STAGES = ("remove_collinear", "intersections", "classification", "clipping", "edge_swapping", "monotone", "animation")
+
+def measure(func, *args, **kwargs):
+    """Runs func twice, returns elapsed time in seconds and peak of allocated memory in bytes,
+    the memory is traced only in the second run as tracing slows the execution down"""
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def build_animation(anim_class, vertices, edge_swapping=False):
+    """Builds the animation and walks all its steps, the animation is lazy otherwise"""
+    anim = anim_class(vertices, edge_swapping=edge_swapping)
+    anim.generate()
+    return anim
+
+def _consume(steps):
+    start = time.perf_counter()
+    for _ in steps:
+        pass
+    return time.perf_counter() - start
+
+def time_stages(vertices, edge_swapping=False, vectorized=False, anim_class=None):
+    """Returns a dict from the stage names to seconds, edge_swapping is how much longer
+    the clipping takes with edge swapping, the animation uses it only if edge_swapping is set"""
+    timings = dict()
+    start = time.perf_counter()
+    vertices, _ = check_points_on_line(vertices)
+    timings["remove_collinear"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    check_intersections(vertices)
+    timings["intersections"] = time.perf_counter() - start
+
+    engine = EarClipping(vertices, vectorized=vectorized)
+    timings["classification"] = _consume(engine.classify_steps())
+    timings["clipping"] = _consume(engine.clip_steps())
+
+    engine = EarClipping(vertices, edge_swapping=True, vectorized=vectorized)
+    _consume(engine.classify_steps())
+    timings["edge_swapping"] = max(0.0, _consume(engine.clip_steps()) - timings["clipping"])
+
+    start = time.perf_counter()
+    MonotoneTriangulation(vertices).run_indices()
+    timings["monotone"] = time.perf_counter() - start
+
+    if anim_class is not None:
+        start = time.perf_counter()
+        build_animation(anim_class, vertices, edge_swapping)
+        timings["animation"] = time.perf_counter() - start
+    return timings
+
+def run(generators, sizes, seed=0, repeat=1, edge_swapping=False, vectorized=False, anim_class=None, memory=False, parallel=()):
+    """Returns a list of result records, the best time of repeat runs is kept for every stage,
+    parallel are worker counts of the triangulation split along diagonals, reported as parallel_<workers> stages"""
+    results = []
+    for name in generators:
+        for size in sizes:
+            vertices = GENERATORS[name](size, seed=seed)
+            best = dict()
+            for _ in range(repeat):
+                for stage, seconds in time_stages(vertices, edge_swapping, vectorized, anim_class).items():
+                    best[stage] = min(seconds, best.get(stage, seconds))
+            for workers in parallel:
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    triangulate_parallel(vertices, edge_swapping=edge_swapping, workers=workers, vectorized=vectorized)
+                    seconds = time.perf_counter() - start
+                    best[f"parallel_{workers}"] = min(seconds, best.get(f"parallel_{workers}", seconds))
+            for stage in STAGES + tuple(f"parallel_{workers}" for workers in parallel):
+                if stage in best:
+                    results.append({"generator": name, "size": size, "stage": stage, "seconds": best[stage]})
+            if memory:
+                _, peak = measure(triangulate, vertices, edge_swapping=edge_swapping, vectorized=vectorized)
+                results.append({"generator": name, "size": size, "stage": "headless_peak", "bytes": peak})
+                if anim_class is not None:
+                    _, peak = measure(build_animation, anim_class, vertices, edge_swapping)
+                    results.append({"generator": name, "size": size, "stage": "animation_peak", "bytes": peak})
+    return results
+
+def compare(results, baseline, tolerance=0.25, min_time=1e-3):
+    """Returns a list of (result, baseline seconds, is regression) for the timed results found in baseline,
+    a stage regresses when it is slower by more than the tolerance (a fraction) and by more than min_time seconds"""
+    base = {(r["generator"], r["size"], r["stage"]): r["seconds"] for r in baseline["results"] if "seconds" in r}
+    rows = []
+    for result in results:
+        key = (result["generator"], result["size"], result["stage"])
+        if "seconds" in result and key in base:
+            before = base[key]
+            regression = result["seconds"] - before > min_time and result["seconds"] > before * (1 + tolerance)
+            rows.append((result, before, regression))
+    return rows
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000], help="Vertex counts of the benchmarked polygons.")
+    parser.add_argument("--generators", nargs="+", choices=list(GENERATORS), default=list(GENERATORS), help="Shapes of the polygons.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the polygon generators.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs, the best time of every stage is reported.")
+    parser.add_argument("--edge-swapping", action="store_true", help="Enable edge swapping in the animation.")
+    parser.add_argument("--vectorized", action="store_true", help="Classify the vertices with NumPy.")
+    parser.add_argument("--memory", action="store_true", help="Report peaks of allocated memory of the headless triangulation and the animation.")
+    parser.add_argument("--parallel", type=int, nargs="+", default=[], metavar="WORKERS", help="Also time the triangulation split along diagonals on these numbers of workers.")
+    parser.add_argument("--json", default=None, help="Write the results to a JSON file, - for stdout.")
+    parser.add_argument("--baseline", default=None, help="Compare the results with a JSON file written before, exit with 1 on a regression.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative slowdown reported as a regression.")
+    parser.add_argument("--min-time", type=float, default=1e-3, help="Slowdowns shorter than this (in seconds) are ignored.")
+    args = parser.parse_args()
+
+    try:
+        from earclipping_anim import EarClippingAnim
+    except ImportError:
+        EarClippingAnim = None
+        print("cairo is not available, skipping the animation benchmark", file=sys.stderr)
+
+    results = run(args.generators, args.sizes, args.seed, args.repeat, args.edge_swapping,
+                  args.vectorized, EarClippingAnim, args.memory, args.parallel)
+
+    compared = dict()
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        compared = {id(result): (before, regression)
+                    for result, before, regression in compare(results, baseline, args.tolerance, args.min_time)}
+
+    # the table goes to stderr when stdout is taken by the JSON
+    out = sys.stderr if args.json == "-" else sys.stdout
+    print(f"{'generator':>10} {'vertices':>9} {'stage':>17} {'value':>12} {'baseline':>12} {'change':>7}", file=out)
+    regressions = 0
+    for result in results:
+        if "seconds" in result:
+            value = f"{result['seconds']:.4f} s"
+        else:
+            value = f"{result['bytes'] / 2**20:.2f} MiB"
+        line = f"{result['generator']:>10} {result['size']:>9} {result['stage']:>17} {value:>12}"
+        if id(result) in compared:
+            before, regression = compared[id(result)]
+            change = result["seconds"] / before - 1 if before > 0 else 0.0
+            line += f" {before:>10.4f} s {change:>+7.0%}" + (" REGRESSION" if regression else "")
+            regressions += regression
+        print(line, file=out)
+
+    if args.json is not None:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "options": {"seed": args.seed, "repeat": args.repeat, "edge_swapping": args.edge_swapping, "vectorized": args.vectorized},
+            "results": results,
+        }
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=1)
+            print()
+        else:
+            with open(args.json, "w") as file:
+                json.dump(report, file, indent=1)
+
+    if regressions:
+        print(f"{regressions} stages are slower than the baseline", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Cache of triangulations keyed by a canonical hash of the polygon
+
+The hash does not depend on the starting vertex nor on the orientation of the rings,
+so a polygon is triangulated once however it is entered. Results are kept
+in a bounded in-memory LRU and optionally in a persistent sqlite file.
+"""
+
+import hashlib
+import sqlite3
+import struct
+from array import array
+from collections import OrderedDict
+
+import point
+from earclipping import triangulate_indices
+
+def canonical_order(ring):
+    """Returns indices of the ring vertices starting at the smallest vertex (by x, then y),
+    going in the direction in which the sequence of vertices is smaller"""
+    n = len(ring)
+    smallest = min(ring)
+    best = None
+    for start in (i for i in range(n) if ring[i] == smallest):
+        for step in (1, -1):
+            order = [(start + step * k) % n for k in range(n)]
+            sequence = [ring[i] for i in order]
+            if best is None or sequence < best[0]:
+                best = (sequence, order)
+    return best[1]
+
+def canonicalize(vertices, holes=()):
+    """Returns (rings, order), rings are the outer ring and the sorted holes in their canonical order,
+    order[i] is the index of the i-th vertex of the rings in vertices followed by the holes"""
+    rings_in = [point.as_points(vertices)] + [point.as_points(hole) for hole in holes]
+    offsets = []
+    offset = 0
+    for ring in rings_in:
+        offsets.append(offset)
+        offset += len(ring)
+
+    canonical = []
+    for ring, offset in zip(rings_in, offsets):
+        order = canonical_order(ring)
+        canonical.append(([ring[i] for i in order], [offset + i for i in order]))
+    # holes can be given in any order too
+    canonical[1:] = sorted(canonical[1:])
+    rings = [ring for ring, _ in canonical]
+    order = [i for _, ring_order in canonical for i in ring_order]
+    return rings, order
+
+def polygon_key(rings, edge_swapping=False):
+    """Returns a hex digest identifying canonical rings and the triangulation options"""
+    digest = hashlib.sha256()
+    digest.update(b"vge-triangulation-1")
+    digest.update(struct.pack("<?I", bool(edge_swapping), len(rings)))
+    for ring in rings:
+        digest.update(struct.pack("<I", len(ring)))
+        # + 0.0 turns -0.0 to 0.0, they are the same coordinate
+        digest.update(struct.pack(f"<{2 * len(ring)}d", *(c + 0.0 for p in ring for c in p)))
+    return digest.hexdigest()
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+    def __repr__(self):
+        return (f"hits: {self.hits}, disk hits: {self.disk_hits}, misses: {self.misses}, "
+                f"evictions: {self.evictions}, hit rate: {self.hit_rate:.0%}")
+
+class TriangulationCache:
+    """Triangulations (and animations) of polygons in a LRU of max_size entries,
+    path enables a persistent sqlite store of the triangulations"""
+    def __init__(self, max_size=128, path=None, vectorized=False):
+        self.max_size = max_size
+        self.vectorized = vectorized
+        self.entries = OrderedDict() # key is the polygon key value is a list of triangles in canonical indices
+        self.animations = OrderedDict() # key is (polygon key, options) value is an animation
+        self.stats = CacheStats()
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path, timeout=30)
+            # several processes may share the file
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS triangulations (key TEXT PRIMARY KEY, triangles BLOB)")
+
+    def _remember(self, entries, key, value):
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _canonical_triangles(self, rings, key, edge_swapping):
+        """Returns triangles as indices to the concatenated canonical rings"""
+        triangles = self.entries.get(key)
+        if triangles is not None:
+            self.entries.move_to_end(key)
+            self.stats.hits += 1
+            return triangles
+
+        if self.db is not None:
+            row = self.db.execute("SELECT triangles FROM triangulations WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                flat = array("i")
+                flat.frombytes(row[0])
+                triangles = list(zip(flat[0::3], flat[1::3], flat[2::3]))
+                self.stats.disk_hits += 1
+                self._remember(self.entries, key, triangles)
+                return triangles
+
+        self.stats.misses += 1
+        triangles = triangulate_indices(rings[0], edge_swapping=edge_swapping, vectorized=self.vectorized, holes=rings[1:])
+        self._remember(self.entries, key, triangles)
+        if self.db is not None:
+            flat = array("i", (i for triangle in triangles for i in triangle))
+            with self.db:
+                self.db.execute("INSERT OR REPLACE INTO triangulations VALUES (?, ?)", (key, flat.tobytes()))
+        return triangles
+
+    def triangulate_indices(self, vertices, edge_swapping=False, holes=()):
+        """Same as earclipping.triangulate_indices, but cached"""
+        rings, order = canonicalize(vertices, holes)
+        key = polygon_key(rings, edge_swapping)
+        return [(order[a], order[b], order[c]) for a, b, c in self._canonical_triangles(rings, key, edge_swapping)]
+
+    def triangulate(self, vertices, edge_swapping=False, holes=()):
+        """Same as earclipping.triangulate, but cached"""
+        rings, order = canonicalize(vertices, holes)
+        key = polygon_key(rings, edge_swapping)
+        flat = [p for ring in rings for p in ring]
+        return [(flat[a], flat[b], flat[c]) for a, b, c in self._canonical_triangles(rings, key, edge_swapping)]
+
+    def animation(self, vertices, edge_swapping=False, holes=(), factory=None, **options):
+        """Returns an animation of the polygon, it is built by
+        factory(vertices, edge_swapping=..., holes=..., **options) only if not cached yet,
+        animations are kept in memory only, they are built lazily anyway"""
+        if factory is None:
+            from earclipping_anim import EarClippingAnim as factory
+        rings, _ = canonicalize(vertices, holes)
+        key = (polygon_key(rings, edge_swapping), factory, tuple(sorted(options.items())))
+        anim = self.animations.get(key)
+        if anim is not None:
+            self.animations.move_to_end(key)
+            self.stats.hits += 1
+            return anim
+        self.stats.misses += 1
+        anim = factory(rings[0], edge_swapping=edge_swapping, holes=rings[1:], **options)
+        self._remember(self.animations, key, anim)
+        return anim
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,199 @@
+"""Triangulation of a single large polygon on several cores
+
+The polygon is split along internal diagonals into pieces of similar size,
+the worker processes read the coordinates from shared memory, triangulate their pieces
+and write the triangles back to shared memory, nothing large is pickled.
+With edge swapping the pieces are swapped by the workers, the seams (the diagonals)
+are legalized afterwards, so the result is Delaunay across the seams too.
+"""
+
+import heapq
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import point
+import predicates
+from delaunay import TriangleMesh
+from earclipping import triangulate_indices
+from holes import merge_holes
+
+def _locally_inside(xy, i, b, ccw):
+    """Does the segment from vertex i to point b start into the interior of the ring?"""
+    m = len(xy)
+    a = xy[i]
+    prev, next = xy[(i - 1) % m], xy[(i + 1) % m]
+    if not ccw:
+        prev, next = next, prev
+    # orientation(x, y, a) is the cross product of x - a and y - a
+    if predicates.orientation(next, prev, a) > 0:
+        # convex vertex, b has to be strictly between the edges
+        return predicates.orientation(next, b, a) > 0 and predicates.orientation(b, prev, a) > 0
+    # reflex vertex, b must not be in the closed outer angle
+    return not (predicates.orientation(prev, b, a) >= 0 and predicates.orientation(b, next, a) >= 0)
+
+def _is_diagonal(xy, starts, ends, i, j, ccw, tolerance):
+    """Does the segment between vertices i and j lie inside the ring? Touching an edge counts as crossing,
+    the test may reject a valid diagonal, never accepts an invalid one"""
+    a, b = xy[i], xy[j]
+    if not _locally_inside(xy, i, b, ccw) or not _locally_inside(xy, j, a, ccw):
+        return False
+    m = len(xy)
+    # edges (k, k + 1) with a bounding box overlapping the segment, except the edges at i and j
+    low, high = np.minimum(a, b), np.maximum(a, b)
+    near = np.flatnonzero(((np.minimum(starts, ends) <= high + tolerance) & (np.maximum(starts, ends) >= low - tolerance)).all(axis=1))
+    near = near[(near != i) & (near != (i - 1) % m) & (near != j) & (near != (j - 1) % m)]
+    if len(near) == 0:
+        return True
+    p, q = starts[near], ends[near]
+    ab = b - a
+    pq = q - p
+    o1 = ab[0] * (p[:, 1] - a[1]) - ab[1] * (p[:, 0] - a[0])
+    o2 = ab[0] * (q[:, 1] - a[1]) - ab[1] * (q[:, 0] - a[0])
+    o3 = pq[:, 0] * (a[1] - p[:, 1]) - pq[:, 1] * (a[0] - p[:, 0])
+    o4 = pq[:, 0] * (b[1] - p[:, 1]) - pq[:, 1] * (b[0] - p[:, 0])
+    # signs within the tolerance are zero, zeros count as touching
+    s1, s2, s3, s4 = (np.where(o > tolerance, 1, np.where(o < -tolerance, -1, 0)) for o in (o1, o2, o3, o4))
+    return not np.any((s1 * s2 <= 0) & (s3 * s4 <= 0))
+
+def find_diagonal(xy, ccw, attempts=8, candidates=4, spread=9):
+    """Returns positions (i, j), i < j, of a diagonal splitting the ring xy (a (m, 2) array)
+    into two parts of similar size, or None if none of the tried candidates is valid,
+    the candidates are the nearest vertices and evenly spaced vertices of the middle half
+    of the ring opposite to i, then of the middle three quarters"""
+    m = len(xy)
+    if m < 6:
+        return None
+    starts, ends = xy, np.roll(xy, -1, axis=0)
+    tolerance = 1e-12 * np.ptp(xy, axis=0).max() ** 2
+    for margin in (m // 4, m // 8):
+        for k in range(attempts):
+            i = k * m // attempts
+            window = (i + np.arange(margin, m - margin + 1)) % m
+            distances = ((xy[window] - xy[i]) ** 2).sum(axis=1)
+            count = min(candidates, len(window))
+            nearest = np.argpartition(distances, count - 1)[:count]
+            chosen = np.concatenate((nearest[np.argsort(distances[nearest])],
+                                     np.linspace(0, len(window) - 1, spread).astype(np.int64)))
+            for j in window[chosen].tolist():
+                if _is_diagonal(xy, starts, ends, i, j, ccw, tolerance):
+                    return min(i, j), max(i, j)
+    return None
+
+def decompose(xy, piece_count, min_size=1000):
+    """Splits the ring xy into at most piece_count pieces along diagonals, the largest piece first,
+    pieces smaller than 2 * min_size are not split, returns the pieces (arrays of vertex indices
+    in the ring order) and the diagonals (pairs of vertex indices)"""
+    signed_area = np.dot(xy[:, 0], np.roll(xy[:, 1], -1)) - np.dot(np.roll(xy[:, 0], -1), xy[:, 1])
+    ccw = signed_area > 0
+    counter = 0 # breaks ties of equally large pieces
+    heap = [(-len(xy), counter, np.arange(len(xy)))]
+    done = []
+    diagonals = []
+    while heap and len(heap) + len(done) < piece_count:
+        size, _, piece = heapq.heappop(heap)
+        diagonal = find_diagonal(xy[piece], ccw) if -size >= 2 * min_size else None
+        if diagonal is None:
+            done.append(piece)
+            continue
+        i, j = diagonal
+        diagonals.append((int(piece[i]), int(piece[j])))
+        for part in (piece[i:j + 1], np.concatenate((piece[j:], piece[:i + 1]))):
+            counter += 1
+            heapq.heappush(heap, (-len(part), counter, part))
+    return done + [piece for _, _, piece in heap], diagonals
+
+_segments = dict() # shared memory attached in this process, key is the name
+
+def _attach(name, dtype, shape):
+    """Returns an array in the shared memory segment created by the parent process"""
+    segment = _segments.get(name)
+    if segment is None:
+        segment = _segments[name] = shared_memory.SharedMemory(name=name)
+        if multiprocessing.get_start_method() == "spawn":
+            # the tracker of a spawned worker would remove the segment of the parent when the worker exits
+            resource_tracker.unregister(segment._name, "shared_memory")
+    return np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+def triangulate_piece(shared, piece_start, piece_stop, triangle_start, edge_swapping=False, vectorized=False, engine="earclipping"):
+    """Triangulates a piece, writes its triangles to the shared triangle array, returns their count,
+    at most the size of the piece - 2, shared are names and shapes of the shared coordinates, pieces and triangles"""
+    (coords_name, coords_shape), (pieces_name, pieces_shape), (triangles_name, triangles_shape) = shared
+    coords = _attach(coords_name, np.float64, coords_shape)
+    piece = _attach(pieces_name, np.int64, pieces_shape)[piece_start:piece_stop]
+    triangles = _attach(triangles_name, np.int64, triangles_shape)
+    local = np.asarray(triangulate_indices(coords[piece], edge_swapping=edge_swapping, vectorized=vectorized, engine=engine), dtype=np.int64)
+    if len(local) > len(piece) - 2:
+        raise ValueError(f"{len(local)} triangles of a piece of {len(piece)} vertices, the polygon is not simple")
+    triangles[triangle_start:triangle_start + len(local)] = piece[local].reshape(-1, 3)
+    return len(local)
+
+def _create_shared(array, segments):
+    segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    segments.append(segment)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+    return segment.name, array.shape
+
+def triangulate_parallel(vertices, edge_swapping=False, holes=None, workers=None, pieces=None, min_piece=1000, vectorized=False,
+                         engine="earclipping"):
+    """Triangulates a simple polygon on several processes, returns triangles as tuples of indices
+    like earclipping.triangulate_indices, the polygon is split into pieces (4 per worker by default)
+    of at least min_piece vertices, fewer if not enough valid diagonals are found,
+    engine triangulates the pieces, see earclipping.triangulate"""
+    vertices = point.as_points(vertices)
+    sources = None
+    if holes:
+        vertices, sources = merge_holes(vertices, [point.as_points(hole) for hole in holes])
+    workers = workers or os.cpu_count() or 1
+    xy = np.array(vertices, dtype=np.float64)
+    parts, diagonals = decompose(xy, pieces or 4 * workers, min_piece)
+
+    if len(parts) == 1:
+        triangles = triangulate_indices(vertices, edge_swapping=edge_swapping, vectorized=vectorized, engine=engine)
+    else:
+        piece_offsets = np.cumsum([0] + [len(part) for part in parts])
+        # a piece has at most its size - 2 triangles, the workers report how many they wrote
+        triangle_offsets = np.cumsum([0] + [len(part) - 2 for part in parts])
+        segments = []
+        try:
+            shared = (_create_shared(xy, segments),
+                      _create_shared(np.concatenate(parts), segments),
+                      _create_shared(np.zeros((triangle_offsets[-1], 3), dtype=np.int64), segments))
+            # the largest pieces go first, so the smaller ones fill the gaps at the end
+            order = sorted(range(len(parts)), key=lambda k: -len(parts[k]))
+            with ProcessPoolExecutor(max_workers=min(workers, len(parts))) as executor:
+                futures = [executor.submit(triangulate_piece, shared, int(piece_offsets[k]), int(piece_offsets[k + 1]),
+                                           int(triangle_offsets[k]), edge_swapping, vectorized, engine) for k in order]
+                counts = dict(zip(order, (future.result() for future in futures)))
+            written = np.ndarray(shared[2][1], dtype=np.int64, buffer=segments[2].buf)
+            triangles = [tuple(triangle) for k in range(len(parts))
+                         for triangle in written[triangle_offsets[k]:triangle_offsets[k] + counts[k]].tolist()]
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    if sources is not None:
+        # back to the indices of the outer ring and the holes, the two sides of a bridge become one edge
+        points = [None] * (max(sources) + 1)
+        for i, source in enumerate(sources):
+            points[source] = vertices[i]
+        vertices = points
+        triangles = [(sources[a], sources[b], sources[c]) for a, b, c in triangles]
+        diagonals = [(sources[a], sources[b]) for a, b in diagonals]
+    if edge_swapping and (diagonals or sources is not None):
+        mesh = TriangleMesh(vertices)
+        for triangle in triangles:
+            mesh.add(triangle)
+        edges = diagonals
+        if sources is not None:
+            # the pieces were swapped in the merged ring, which cannot flip the bridge edges
+            repeated = {source for source, count in Counter(sources).items() if count > 1}
+            edges = edges + [edge for edge in mesh.edges if edge[0] in repeated or edge[1] in repeated]
+        mesh.legalize(edges)
+        triangles = list(mesh)
+    return triangles
@@ -0,0 +1,113 @@
+"""Triangle mesh with edge adjacency and Delaunay legalization by edge flipping"""
+
+import predicates
+import quality
+
+def edge_key(a, b):
+    """Returns key of an undirected edge between vertex indices a and b"""
+    return (a, b) if a < b else (b, a)
+
+class TriangleMesh:
+    """Triangles defined by vertex indices with a map from edges to adjacent triangles,
+    all triangles are expected to have the same orientation"""
+    def __init__(self, vertices):
+        self.vertices = vertices # coordinates of the vertices, indexed by vertex index
+        self.triangles = dict() # key is triangle id value is a tuple of 3 vertex indices
+        self.edges = dict() # key is edge_key value is a list of at most 2 triangle ids
+        self.next_id = 0
+
+    def add(self, triangle):
+        """Adds a triangle, returns its id"""
+        tid = self.next_id
+        self.next_id += 1
+        self.triangles[tid] = triangle
+        a, b, c = triangle
+        for edge in (edge_key(a, b), edge_key(b, c), edge_key(c, a)):
+            self.edges.setdefault(edge, []).append(tid)
+        return tid
+
+    def remove(self, tid):
+        a, b, c = self.triangles.pop(tid)
+        for edge in (edge_key(a, b), edge_key(b, c), edge_key(c, a)):
+            adjacent = self.edges[edge]
+            adjacent.remove(tid)
+            if not adjacent:
+                del self.edges[edge]
+
+    def __len__(self):
+        return len(self.triangles)
+
+    def __iter__(self):
+        return iter(self.triangles.values())
+
+    def edges_of(self, tid):
+        a, b, c = self.triangles[tid]
+        return [(a, b), (b, c), (c, a)]
+
+    def apex(self, tid, a, b):
+        """Returns the vertex of triangle tid which is not on edge (a, b)"""
+        for vertex in self.triangles[tid]:
+            if vertex != a and vertex != b:
+                return vertex
+
+    def flip(self, a, b):
+        """Replaces the two triangles sharing edge (a, b) by two triangles sharing the other diagonal,
+        returns the new diagonal and the new triangles, or None if the edge has not two triangles"""
+        adjacent = self.edges.get(edge_key(a, b))
+        if adjacent is None or len(adjacent) != 2:
+            return None
+        t1, t2 = adjacent
+        # orient the edge the way it goes in the first triangle
+        x, y, z = self.triangles[t1]
+        if (x, y) in ((b, a), (a, b)):
+            a, b = x, y
+        elif (y, z) in ((b, a), (a, b)):
+            a, b = y, z
+        else:
+            a, b = z, x
+        c = self.apex(t1, a, b)
+        d = self.apex(t2, a, b)
+        self.remove(t1)
+        self.remove(t2)
+        new1 = (a, d, c)
+        new2 = (d, b, c)
+        self.add(new1)
+        self.add(new2)
+        return (c, d), new1, new2
+
+    def is_illegal(self, a, b):
+        """Checks the Delaunay condition on edge (a, b),
+        the edge is illegal when the vertex opposite to it lies inside the circumcircle of the other triangle,
+        that is when the sum of the angles opposite to it is greater than pi"""
+        adjacent = self.edges.get(edge_key(a, b))
+        if adjacent is None or len(adjacent) != 2:
+            return False
+        t1, t2 = adjacent
+        c = self.apex(t1, a, b)
+        d = self.apex(t2, a, b)
+        if c is None or d is None:
+            return False
+        va, vb, vc, vd = self.vertices[a], self.vertices[b], self.vertices[c], self.vertices[d]
+        # the flip is possible only for a strictly convex quadrilateral
+        if _cross(vc, vd, va) * _cross(vc, vd, vb) >= 0:
+            return False
+        return quality.in_circumcircle(va, vb, vc, vd)
+
+    def legalize(self, edges, on_flip=None):
+        """Flips illegal edges until all edges reachable from the given ones meet the Delaunay condition,
+        on_flip is called with the flipped edge and the new diagonal and triangles"""
+        stack = list(edges)
+        while stack:
+            a, b = stack.pop()
+            if not self.is_illegal(a, b):
+                continue
+            diagonal, new1, new2 = self.flip(a, b)
+            if on_flip is not None:
+                on_flip((a, b), diagonal, new1, new2)
+            # the outer edges of the quadrilateral may have become illegal
+            c, d = diagonal
+            stack.extend(((a, d), (d, b), (b, c), (c, a)))
+
+def _cross(a, b, c):
+    """Does c lie on, to the left of, or to the right of ab vector? The sign is exact"""
+    return predicates.orientation(a, b, c)
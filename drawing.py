@@ -1,5 +1,6 @@
 """Definitions of animation building blocks"""
 
+import bisect
 import cairo
 import math
 from point import EPS, Point
@@ -12,36 +13,166 @@ def parallel_anims(anims):
             anim(ctx, time)
     return func
 
+class Timeline:
+    """Sequence of animation steps given by their durations,
+    start and end times are prefix sums so the active step is found by bisection,
+    steps can be appended while the timeline is already played"""
+    def __init__(self, durations=()):
+        self.durations = []
+        self.end_times = []
+        self.start_times = []
+        self.length = 0
+        for duration in durations:
+            self.append(duration)
+
+    def __len__(self):
+        return len(self.durations)
+
+    def append(self, duration):
+        self.durations.append(duration)
+        self.start_times.append(self.length)
+        self.length += duration
+        self.end_times.append(self.length)
+
+    def step_bounds(self, index):
+        """Returns start and end of a step as a fraction of the whole timeline"""
+        if self.length == 0:
+            return 0.0, 0.0
+        return self.start_times[index] / self.length, self.end_times[index] / self.length
+
+    def locate(self, time):
+        """Returns index of the step active at time (fraction of the whole timeline)
+        and the progress of that step, index is None when time is past the end"""
+        return self.locate_time(time * self.length)
+
+    def locate_time(self, time):
+        """Same as locate, but time is measured in the units of the durations"""
+        if time <= 0:
+            return (0, 0.0) if self.durations else (None, 1.0)
+        index = bisect.bisect_left(self.end_times, time)
+        if index == len(self.end_times):
+            return None, 1.0
+        duration = self.durations[index]
+        return index, (time - self.start_times[index]) / duration if duration else 1.0
+
+    def seek(self, index):
+        """Returns time (fraction of the whole timeline) at which step index starts,
+        index is clamped to the existing steps"""
+        if self.length == 0:
+            return 0.0
+        return self.seek_time(index) / self.length
+
+    def seek_time(self, index):
+        """Same as seek, but time is measured in the units of the durations"""
+        if not self.durations:
+            return 0
+        index = min(max(index, 0), len(self.durations) - 1)
+        return self.start_times[index]
+
 def combine_anims(anims, timeline):
     """Combines animations in anims to a single animation function,
     anims and timeline should be the same lenght,
     timeline should be a list of float numbers 
-    that define the ratios of time of animations"""
+    that define the ratios of time of animations, or a Timeline"""
+    if not isinstance(timeline, Timeline):
+        timeline = Timeline(timeline)
     if len(anims) != len(timeline):
         raise ValueError("anims and timeline should be the same length")
-    
-    timeline_length = sum(timeline)
-    # prefix sum
-    start_times = [sum(timeline[:i]) for i in range(len(timeline))]
-    end_times = [sum(timeline[:i+1]) for i in range(len(timeline))]
+
     def func(ctx, time):
-        time = time * timeline_length
-        index = None
-        for i in range(len(start_times)):
-            if time >= start_times[i] and time <= end_times[i]:
-                index = i
-                break
+        index, progress = timeline.locate(time)
         if index is not None:
             # finish previous anims
             for i in range(index):
                 anims[i](ctx, 1.0)
-            anims[index](ctx, (time - start_times[index])/timeline[index])
+            anims[index](ctx, progress)
         else:
             # just finish all anims as time > 1
             for anim in anims:
                 anim(ctx, 1.0)
     return func
 
+class CachedAnim:
+    """Combines animations like combine_anims, but keeps all finished steps
+    rendered in an offscreen layer, so a frame draws only the layer and the active step,
+    snapshots of the layer (keyframes) are kept every keyframe_interval steps
+    to restore it quickly when the time goes backwards,
+    anims and timeline may grow while playing, the interval then grows too"""
+    def __init__(self, anims, timeline, width, height, keyframe_interval=64, max_keyframes=64):
+        if not isinstance(timeline, Timeline):
+            timeline = Timeline(timeline)
+        if len(anims) != len(timeline):
+            raise ValueError("anims and timeline should be the same length")
+        self.anims = anims
+        self.timeline = timeline
+        self.width = width
+        self.height = height
+        # keep the number of snapshots, and so the memory, bounded
+        self.keyframe_interval = max(keyframe_interval, math.ceil(len(anims) / max_keyframes))
+        self.max_keyframes = max_keyframes
+        self.keyframes = dict() # key is the number of finished steps value is a snapshot of the layer
+        self.layer = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        self.layer_steps = 0 # number of finished steps drawn in the layer
+
+    def __call__(self, ctx, time):
+        index, progress = self.timeline.locate(time)
+        finished = len(self.anims) if index is None else index
+        self._finish_steps(finished, ctx)
+        ctx.save()
+        ctx.set_source_surface(self.layer, 0, 0)
+        ctx.paint()
+        ctx.restore()
+        if index is not None:
+            self.anims[index](ctx, progress)
+
+    def _layer_context(self, ctx):
+        """Returns a context drawing into the layer with the same settings as ctx"""
+        layer_ctx = cairo.Context(self.layer)
+        layer_ctx.set_antialias(ctx.get_antialias())
+        layer_ctx.set_line_width(ctx.get_line_width())
+        return layer_ctx
+
+    def _finish_steps(self, count, ctx):
+        """Updates the layer to contain exactly the first count steps finished"""
+        if count == self.layer_steps:
+            return
+        if count < self.layer_steps:
+            # restore the nearest keyframe before count
+            keyframe = count // self.keyframe_interval * self.keyframe_interval
+            layer_ctx = cairo.Context(self.layer)
+            layer_ctx.set_operator(cairo.OPERATOR_SOURCE)
+            if keyframe in self.keyframes:
+                layer_ctx.set_source_surface(self.keyframes[keyframe], 0, 0)
+            else:
+                keyframe = 0
+                layer_ctx.set_source_rgba(0, 0, 0, 0)
+            layer_ctx.paint()
+            self.layer_steps = keyframe
+
+        layer_ctx = self._layer_context(ctx)
+        for i in range(self.layer_steps, count):
+            self.anims[i](layer_ctx, 1.0)
+            if (i + 1) % self.keyframe_interval == 0 and (i + 1) not in self.keyframes:
+                self.layer.flush()
+                self.keyframes[i + 1] = self._snapshot()
+                if len(self.keyframes) > self.max_keyframes:
+                    self._thin_keyframes()
+        self.layer_steps = count
+        self.layer.flush()
+
+    def _thin_keyframes(self):
+        """Doubles the keyframe interval and drops the keyframes off the new interval"""
+        self.keyframe_interval *= 2
+        self.keyframes = {steps: snapshot for steps, snapshot in self.keyframes.items() if steps % self.keyframe_interval == 0}
+
+    def _snapshot(self):
+        snapshot = cairo.ImageSurface(cairo.FORMAT_ARGB32, self.width, self.height)
+        snapshot_ctx = cairo.Context(snapshot)
+        snapshot_ctx.set_source_surface(self.layer, 0, 0)
+        snapshot_ctx.paint()
+        snapshot.flush()
+        return snapshot
+
 def create_pause_anim():
     """Returs a function that draw nothing"""
     def func(ctx, time):
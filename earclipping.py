@@ -0,0 +1,344 @@
+"""Headless implementation of earclipping algorithm and its enhancement according to https://arxiv.org/abs/1212.6038"""
+
+import math
+
+import numpy as np
+
+import point
+import predicates
+import quality
+from linkedlist import ArrayRing
+from spatialindex import UniformGrid
+from vectorized import classify_vertices
+from delaunay import TriangleMesh
+from holes import merge_holes
+from indexedmesh import IndexedMesh, as_coordinates
+from instrumentation import CountingEarQueue
+from monotone import MonotoneTriangulation
+from priorityqueue import EarQueue
+
+class EarClippingObserver:
+    """Receives notifications about the steps of the algorithm,
+    all hooks do nothing by default, override only the needed ones"""
+
+    # set to False if vertex_checked is not needed, the engine then skips collecting the conflicts
+    reports_checks = True
+
+    def polygon_started(self, vertices):
+        """Called once with the ordered vertices of the polygon"""
+
+    def vertex_checked(self, triangle, conflicts, is_ear):
+        """Called whenever the middle vertex of triangle is (re)classified,
+        conflicts are the vertices lying inside the triangle"""
+
+    def ear_clipped(self, triangle):
+        """Called when an ear is clipped from the polygon"""
+
+    def edge_swapped(self, edge, t1, t2):
+        """Called when edge is swapped and replaced by triangles t1 and t2"""
+
+    def polygon_finished(self, vertices):
+        """Called once after the polygon is fully triangulated"""
+
+
+class EarClipping:
+    def __init__(self, vertices, edge_swapping=False, observer=None, vectorized=False, holes=None, stats=None,
+                 metric="min_angle"):
+        """holes are merged into the polygon by bridge edges, the vertices of a bridge repeat,
+        stats is an instrumentation.EngineStats collecting counters and phase times, None disables it,
+        metric is the name of a quality.METRICS function, the best ear by it is clipped first"""
+        if len(vertices) < 3:
+            raise ValueError("vertices should have at least 3 items")
+        vertices = point.as_points(vertices)
+        # indices of the vertices to the outer ring followed by the holes, None if unchanged
+        self.sources = None
+        if holes:
+            holes = [point.as_points(hole) for hole in holes]
+            if any(len(hole) < 3 for hole in holes):
+                raise ValueError("holes should have at least 3 items")
+            merge = merge_holes if stats is None else stats.timed("holes", merge_holes)
+            vertices, self.sources = merge(vertices, holes)
+        # order vertices to be counter-clockwise
+        self.reversed = not self._is_clockwise(vertices)
+        if self.reversed:
+            vertices = list(reversed(vertices))
+            self.sources = list(reversed(self.sources if self.sources is not None else range(len(vertices))))
+        self.vertices = vertices
+        self.edge_swapping = edge_swapping
+        self.metric = metric
+        self._quality = quality.METRICS[metric]
+        self.observer = observer
+        # the vectorized initial classification does not collect conflicts for the observer
+        self.vectorized = vectorized and observer is None
+        self.stats = stats
+        if stats is not None:
+            # instance attributes shadow the methods, the plain engine has no overhead
+            self._is_ear = stats.counted("ear_tests", self._is_ear)
+            self._get_conflicting = stats.counted("ear_tests", self._get_conflicting)
+            self._is_vertex_in_triangle = stats.counted("point_tests", self._is_vertex_in_triangle)
+
+    def run(self):
+        """Walks the steps of the algorithm and returns a list of triangles"""
+        vertices_list = self.vertices
+        return [(vertices_list[a], vertices_list[b], vertices_list[c]) for a, b, c in self._clip()]
+
+    def run_indices(self):
+        """Walks the steps of the algorithm and returns a list of triangles
+        as tuples of indices to the vertices given to the constructor followed by the holes"""
+        if self.sources is not None:
+            sources = self.sources
+            return [(sources[a], sources[b], sources[c]) for a, b, c in self._clip()]
+        return list(self._clip())
+
+    def run_mesh(self):
+        """Walks the steps of the algorithm and returns an indexedmesh.IndexedMesh
+        of the vertices given to the constructor followed by the holes"""
+        self._clip()
+        return self.indexed_mesh()
+
+    def indexed_mesh(self):
+        """Returns the finished triangulation (self.mesh) as an indexedmesh.IndexedMesh"""
+        mesh = self.mesh
+        if self.sources is None:
+            return IndexedMesh.from_mesh(self.vertices, mesh)
+        # the bridge vertices repeat, they are stored once
+        vertices = np.empty((max(self.sources) + 1, 2))
+        vertices[self.sources] = as_coordinates(self.vertices)
+        return IndexedMesh.from_mesh(vertices, mesh, self.sources)
+
+    def _clip(self):
+        """Clips the ears, returns the resulting TriangleMesh"""
+        for _ in self.steps():
+            pass
+        return self.mesh
+
+    def steps(self):
+        """Walks the steps of the algorithm lazily, yields after every initial classification
+        of a vertex and after every clipped ear, the observer is notified as the steps happen,
+        the resulting TriangleMesh is in self.mesh once the generator is exhausted"""
+        yield from self.classify_steps()
+        yield from self.clip_steps()
+
+    def classify_steps(self):
+        """The first phase of steps, classifies all vertices"""
+        steps = self._classify_steps()
+        return steps if self.stats is None else self.stats.timed_steps("classification", steps)
+
+    def clip_steps(self):
+        """The second phase of steps, clips the ears found by classify_steps"""
+        steps = self._clip_steps()
+        return steps if self.stats is None else self.stats.timed_steps("clipping", steps)
+
+    def _classify_steps(self):
+        vertices_list = self.vertices
+        observer = self.observer
+
+        # initialize ring of vertex indices
+        vertices = ArrayRing(vertices_list)
+        self._ring = vertices
+
+        if observer is not None:
+            observer.polygon_started(vertices_list)
+
+        if self.vectorized:
+            is_reflex, is_ear = classify_vertices(vertices.x, vertices.y)
+            if self.stats is not None:
+                self.stats.counts["ear_tests"] += len(vertices_list)
+        else:
+            is_reflex = [self._orientation(vertices_list[i - 1], vertex, vertices_list[(i + 1) % len(vertices_list)]) >= 0
+                         for i, vertex in enumerate(vertices_list)]
+
+        # only reflex (and flat) vertices can prevent a convex vertex from being an ear
+        self._reflex = UniformGrid.from_points([(i, vertices_list[i]) for i in range(len(vertices_list)) if is_reflex[i]])
+
+        # create a priority queue of ears ordered by the quality metric
+        ears = EarQueue(len(vertices_list)) if self.stats is None else CountingEarQueue(len(vertices_list), self.stats)
+        for i in range(len(vertices_list)):
+            if self.vectorized:
+                self._register(i, is_ear[i], ears)
+            else:
+                self._classify(i, ears)
+                yield
+        self._ears = ears
+
+    def _clip_steps(self):
+        vertices_list = self.vertices
+        vertices = self._ring
+        observer = self.observer
+        ears = self._ears
+
+        mesh = TriangleMesh(vertices_list)
+        self.mesh = mesh
+        # the mesh stores every bridge vertex under its first index, so the bridge edges are shared and can be swapped
+        shared = None
+        if self.sources is not None:
+            first = dict()
+            shared = [first.setdefault(source, i) for i, source in enumerate(self.sources)]
+        if self.stats is not None:
+            mesh.is_illegal = self.stats.counted("swap_tests", mesh.is_illegal)
+            mesh.flip = self.stats.counted("flips", mesh.flip)
+            mesh.legalize = self.stats.timed("edge_swapping", mesh.legalize)
+        while len(vertices) > 2:
+            # select the best ear, with the maximal minimum angle by default
+            if not ears:
+                raise ValueError("no ear found, the polygon is not simple")
+            _, selected_ear = ears.pop()
+            prev = vertices.prev[selected_ear]
+            next = vertices.next[selected_ear]
+            if observer is not None:
+                observer.ear_clipped((vertices_list[prev], vertices_list[selected_ear], vertices_list[next]))
+            triangle = (prev, selected_ear, next)
+            if shared is not None:
+                merged = (shared[prev], shared[selected_ear], shared[next])
+                # a triangle with both ends of a bridge keeps them apart
+                if len(set(merged)) == 3:
+                    triangle = merged
+            tid = mesh.add(triangle)
+
+            # edge swapping, not necessary, but improves the result quality
+            if self.edge_swapping:
+                mesh.legalize(mesh.edges_of(tid), on_flip=self._on_flip if observer is not None else None)
+
+            # update neighbours
+            vertices.remove(selected_ear)
+            self._reflex.remove(selected_ear, vertices_list[selected_ear])
+            if len(vertices) > 3:
+                for neighbour in (prev, next):
+                    self._classify(neighbour, ears)
+            yield
+
+        if observer is not None:
+            observer.polygon_finished(vertices_list)
+
+    def _classify(self, i, ears):
+        """Decides whether vertex i is an ear and registers it accordingly"""
+        v0, v1, v2 = self._triangle_at(i)
+        if self._orientation(v0, v1, v2) < 0:
+            # a reflex vertex becomes convex when its neighbour is clipped
+            self._reflex.remove(i, v1)
+
+        if self.observer is not None and self.observer.reports_checks:
+            # all conflicts are needed only to show why a vertex is not an ear
+            conflicts = self._get_conflicting(v0, v1, v2)
+            is_ear = self._orientation(v0, v1, v2) <= 0 and not conflicts
+            self.observer.vertex_checked((v0, v1, v2), conflicts, is_ear)
+        else:
+            is_ear = self._is_ear(v0, v1, v2)
+        self._register(i, is_ear, ears)
+
+    def _register(self, i, is_ear, ears):
+        """Queues vertex i as an ear (or updates its quality), or removes it from the queue of ears"""
+        if is_ear:
+            v0, v1, v2 = self._triangle_at(i)
+            if point.point_eq(v0, v2):
+                # a spike between repeated vertices, it is clipped first
+                ears.push(i, math.inf)
+            else:
+                ears.push(i, self._quality(v0, v1, v2))
+        else:
+            ears.discard(i)
+
+    def _triangle_at(self, i):
+        """Returns the triangle formed by vertex i and its current neighbours"""
+        return self.vertices[self._ring.prev[i]], self.vertices[i], self.vertices[self._ring.next[i]]
+
+    def _on_flip(self, edge, diagonal, t1, t2):
+        """Notifies the observer about an edge flip during legalization"""
+        v = self.vertices
+        self.observer.edge_swapped((v[edge[0]], v[edge[1]]), tuple(v[i] for i in t1), tuple(v[i] for i in t2))
+
+    def _is_ear(self, v0, v1, v2):
+        if self._orientation(v0, v1, v2) > 0:
+            return False
+        for _ in self._iter_conflicting(v0, v1, v2):
+            return False
+        return True
+
+    def _get_conflicting(self, v0, v1, v2):
+        if self._orientation(v0, v1, v2) > 0:
+            return []
+        return list(self._iter_conflicting(v0, v1, v2))
+
+    def _iter_conflicting(self, v0, v1, v2):
+        """Yields remaining reflex vertices lying inside the triangle"""
+        is_vertex_in_triangle = self._is_vertex_in_triangle
+        for _, vertex in self._reflex.query_triangle(v0, v1, v2):
+            # points are tuples, != compares the coordinates like point.point_eq
+            if vertex != v0 and vertex != v1 and vertex != v2 and is_vertex_in_triangle(vertex, v0, v1, v2):
+                yield vertex
+
+    # exact in sign, the float arithmetic is used unless the result is uncertain
+    _is_vertex_in_triangle = staticmethod(predicates.point_in_triangle)
+    _orientation = staticmethod(predicates.orientation)
+
+    def _is_clockwise(self, vertices):
+        """Determins whether a polygon is clockwise or anti-clockwise"""
+        criterion = 0
+        vertex_count = len(vertices)
+        for i in range(0, vertex_count ):
+            a = i
+            b = (i + 1) % vertex_count
+            criterion += (vertices[b].x - vertices[a].x)*(vertices[b].y + vertices[a].y)
+
+        return criterion > 0
+
+
+ENGINES = ("earclipping", "monotone", "auto")
+
+# polygons at least this large are triangulated by the monotone engine when the engine is auto,
+# smaller ones by ear clipping, which clips the best ears first and costs a few milliseconds there
+MONOTONE_MIN_SIZE = 1000
+
+def select_engine(vertex_count, edge_swapping=False, observer=None):
+    """Returns the engine chosen by engine="auto", the monotone engine is faster at all sizes,
+    ear clipping gives better triangles without edge swapping and reports its steps to an observer"""
+    if observer is not None:
+        return "earclipping"
+    if edge_swapping or vertex_count >= MONOTONE_MIN_SIZE:
+        return "monotone"
+    return "earclipping"
+
+def _engine(vertices, edge_swapping, observer, vectorized, holes, stats, metric, engine):
+    if engine == "monotone":
+        if observer is not None:
+            raise ValueError("the monotone engine does not support observers")
+        return MonotoneTriangulation(vertices, edge_swapping=edge_swapping, holes=holes, stats=stats)
+    if engine != "earclipping":
+        raise ValueError(f"unknown engine {engine}, expected one of {', '.join(ENGINES)}")
+    return EarClipping(vertices, edge_swapping=edge_swapping, observer=observer, vectorized=vectorized, holes=holes,
+                       stats=stats, metric=metric)
+
+def _run(method, vertices, edge_swapping, observer, vectorized, holes, stats, metric, engine):
+    """Creates the engine and returns the result of its method, auto falls back to ear clipping
+    when the monotone engine rejects the polygon, ear clipping handles rings touching themselves too"""
+    if engine == "auto":
+        engine = select_engine(len(vertices) + sum(len(hole) for hole in holes or ()), edge_swapping, observer)
+        if engine == "monotone":
+            try:
+                return getattr(_engine(vertices, edge_swapping, observer, vectorized, holes, stats, metric, engine), method)()
+            except ValueError:
+                engine = "earclipping"
+    return getattr(_engine(vertices, edge_swapping, observer, vectorized, holes, stats, metric, engine), method)()
+
+def triangulate(vertices, edge_swapping=False, observer=None, vectorized=False, holes=None, stats=None, metric="min_angle",
+                engine="earclipping"):
+    """Triangulates a simple polygon, returns a list of triangles (tuples of 3 points),
+    vectorized enables NumPy classification of the vertices, it pays off for large polygons,
+    holes is a list of rings lying inside the polygon,
+    stats (an instrumentation.EngineStats) collects counters and phase times,
+    metric (a name from quality.METRICS) decides the order of clipped ears,
+    engine is earclipping, monotone (monotone.MonotoneTriangulation, O(n log n), ignores vectorized and metric)
+    or auto (see select_engine)"""
+    return _run("run", vertices, edge_swapping, observer, vectorized, holes, stats, metric, engine)
+
+def triangulate_indices(vertices, edge_swapping=False, vectorized=False, holes=None, stats=None, metric="min_angle",
+                        engine="earclipping"):
+    """Triangulates a simple polygon, returns a list of triangles as tuples of 3 indices
+    to vertices followed by the vertices of all holes"""
+    return _run("run_indices", vertices, edge_swapping, None, vectorized, holes, stats, metric, engine)
+
+def triangulate_mesh(vertices, edge_swapping=False, vectorized=False, holes=None, stats=None, metric="min_angle",
+                     engine="earclipping"):
+    """Triangulates a simple polygon, returns an indexedmesh.IndexedMesh, its vertices are
+    the vertices followed by the vertices of all holes, the triangles are the same as of triangulate_indices"""
+    return _run("run_mesh", vertices, edge_swapping, None, vectorized, holes, stats, metric, engine)
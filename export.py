@@ -0,0 +1,243 @@
+"""Headless export of the triangulation animation to PNG frames, an animated GIF or raw RGBA
+
+Every frame is a pure function of the animation time, so ranges of frames
+are rendered by worker processes and written in order by the main process.
+
+Usage:
+    python -m export --example ex3 -o ex3.gif
+    python -m export polygons.jsonl --fit -o frames/{id}/{frame:05d}.png --workers 8
+    python -m export --example ex1 -o - --format raw | ffmpeg -f rawvideo -pix_fmt rgba -s 512x512 -r 30 -i - ex1.mp4
+"""
+
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+import cairo
+from PIL import Image
+
+import polygonio
+import sweepline
+from batch import run_tasks
+from drawing import rgba_to_bgra
+from earclipping_anim import EarClippingAnim
+from examples import examples_dict
+from helpfunctions import remove_collinear
+from point import Point
+
+FORMATS = ("png", "gif", "raw")
+
+def guess_format(path):
+    """Guesses the output format from the file extension, raw RGBA is the default"""
+    for fmt in FORMATS[:2]:
+        if path.lower().endswith("." + fmt):
+            return fmt
+    return "raw"
+
+def frame_count(length, fps, speed=1.0):
+    """Number of frames of an animation with timeline length (in seconds at speed 1),
+    the first frame shows time 0 and the last one time 1"""
+    return max(2, round(length / speed * fps) + 1)
+
+def fit_to_frame(vertices, width, height, margin=0.1, holes=()):
+    """Scales and centers vertices to fill the frame except for the margin (fraction of the frame),
+    returns the transformed vertices and holes"""
+    xs = [v.x for v in vertices]
+    ys = [v.y for v in vertices]
+    extent = max(max(xs) - min(xs), max(ys) - min(ys)) or 1.0
+    scale = min(width, height) * (1 - 2 * margin) / extent
+    cx = (max(xs) + min(xs)) / 2
+    cy = (max(ys) + min(ys)) / 2
+    def transform(ring):
+        return [Point(width / 2 + (v.x - cx) * scale, height / 2 + (v.y - cy) * scale) for v in ring]
+    return transform(vertices), [transform(hole) for hole in holes]
+
+_anim = (None, None) # the last animation built in this process with its key
+
+def render_frames(key, vertices, holes, start, stop, count, length, width, height, edge_swapping=False):
+    """Renders frames start..stop of count frames of an animation with timeline length,
+    returns (key, frame index, RGBA bytes) triples, the steps are walked only up to the last rendered frame,
+    the channels are reordered by rgba_to_bgra already, so the ARGB32 data is RGBA in memory"""
+    global _anim
+    anim_key = (tuple(vertices), tuple(map(tuple, holes)), edge_swapping, width, height)
+    if _anim[0] != anim_key:
+        # consecutive ranges of one polygon usually land in the same worker, the finished steps stay cached
+        _anim = (anim_key, EarClippingAnim(vertices, edge_swapping=edge_swapping, cache_size=(width, height), holes=holes))
+    anim = _anim[1]
+
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+    ctx = cairo.Context(surface)
+    ctx.set_antialias(cairo.Antialias(cairo.Antialias.GOOD))
+    frames = []
+    for i in range(start, stop):
+        ctx.save()
+        ctx.set_source_rgba(*rgba_to_bgra(0,0,0,1))
+        ctx.rectangle(0, 0, width, height)
+        ctx.fill()
+        ctx.set_line_width(2)
+        anim.draw_at(ctx, i / (count - 1) * length)
+        ctx.restore()
+        surface.flush()
+        frames.append((key, i, bytes(surface.get_data())))
+    return frames
+
+class PngWriter:
+    """Writes frames to files named by a template with {id} and {frame} fields"""
+    def __init__(self, template, polygon_id, width, height):
+        self.template = template
+        self.polygon_id = polygon_id
+        self.size = (width, height)
+
+    def write(self, index, data):
+        path = self.template.format(id=self.polygon_id, frame=index)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.frombuffer("RGBA", self.size, data, "raw", "RGBA", 0, 1).convert("RGB").save(path)
+
+    def close(self):
+        pass
+
+class GifWriter:
+    """Collects frames and writes a looping animated GIF on close"""
+    def __init__(self, path, width, height, fps):
+        self.path = path
+        self.size = (width, height)
+        self.duration = 1000 / fps
+        self.frames = []
+
+    def write(self, index, data):
+        # a palette image is four times smaller than the RGBA data
+        image = Image.frombuffer("RGBA", self.size, data, "raw", "RGBA", 0, 1).convert("RGB")
+        self.frames.append(image.quantize())
+
+    def close(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        first, *rest = self.frames
+        first.save(self.path, save_all=True, append_images=rest, duration=self.duration, loop=0)
+
+class RawWriter:
+    """Writes frames as a headerless RGBA stream, "-" stands for stdout"""
+    def __init__(self, path):
+        self.file = sys.stdout.buffer if path == "-" else open(path, "wb")
+
+    def write(self, index, data):
+        self.file.write(data)
+
+    def close(self):
+        if self.file is sys.stdout.buffer:
+            self.file.flush()
+        else:
+            self.file.close()
+
+def create_writer(fmt, output, polygon_id, width, height, fps):
+    if fmt == "png":
+        return PngWriter(output, polygon_id, width, height)
+    path = output if output == "-" else output.format(id=polygon_id)
+    if fmt == "gif":
+        return GifWriter(path, width, height, fps)
+    return RawWriter(path)
+
+def prepare_polygon(vertices, holes=()):
+    """Cleans the rings of the polygon the same way as the application does,
+    returns the vertices and holes or None if the polygon can not be triangulated"""
+    rings = [remove_collinear(ring)[0] for ring in [vertices, *holes]]
+    if any(len(ring) < 3 or not sweepline.is_simple(ring) for ring in rings):
+        return None
+    return rings[0], rings[1:]
+
+def export(polygons, output, fmt, width=512, height=512, fps=30, speed=1.0, edge_swapping=False,
+           workers=None, chunk_size=16):
+    """Exports the animation of every (id, vertices, holes) polygon, returns the number of frames written,
+    frame ranges of all polygons share one process pool"""
+    jobs = []
+    for polygon_id, vertices, holes in polygons:
+        # the timeline length is needed for the number of frames, walking the steps is cheap
+        anim = EarClippingAnim(vertices, edge_swapping=edge_swapping, holes=holes)
+        anim.generate()
+        count = frame_count(anim.length, fps, speed)
+        jobs.append((polygon_id, vertices, holes, count, anim.length))
+
+    def tasks():
+        for key, (_, vertices, holes, count, length) in enumerate(jobs):
+            for start in range(0, count, chunk_size):
+                yield render_frames, (key, vertices, holes, start, min(start + chunk_size, count), count, length, width, height)
+
+    options = dict(edge_swapping=edge_swapping)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        frames = (frame for func, args in tasks() for frame in func(*args, **options))
+    else:
+        frames = run_tasks(tasks(), workers, options)
+
+    written = 0
+    writer = None
+    current = None
+    for key, index, data in frames:
+        if key != current:
+            if writer is not None:
+                writer.close()
+            current = key
+            writer = create_writer(fmt, output, jobs[key][0], width, height, fps)
+        writer.write(index, data)
+        written += 1
+    if writer is not None:
+        writer.close()
+    return written
+
+def main():
+    parser = ArgumentParser(prog="python -m export")
+    parser.add_argument("input", nargs="*", help="Polygon files like for the batch triangulation, - for stdin.")
+    parser.add_argument("--example", action="append", default=[], choices=list(examples_dict), help="Export a built-in example, can be repeated.")
+    parser.add_argument("-o", "--output", required=True,
+                        help="Output file, - for raw stdout, may contain {id}, PNG frames need {frame} like frames/{id}/{frame:05d}.png.")
+    parser.add_argument("--format", choices=FORMATS, help="Output format, guessed from the extension by default.")
+    parser.add_argument("--input-format", choices=polygonio.FORMATS, help="Input format, guessed from the extension by default.")
+    parser.add_argument("--width", type=int, default=512, help="The width of the frames.")
+    parser.add_argument("--height", type=int, default=512, help="The height of the frames.")
+    parser.add_argument("--fps", type=float, default=30, help="Frames per second of the output.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Speed of the animation like in the application.")
+    parser.add_argument("--fit", action="store_true", help="Scale the polygons to fill the frame.")
+    parser.add_argument("--edge-swapping", action="store_true", help="Animate the triangulation with edge swapping.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes, all cores by default.")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Number of frames rendered by a worker at once.")
+    args = parser.parse_args()
+
+    polygons = [(name, examples_dict[name], []) for name in args.example]
+    for path in args.input:
+        file = polygonio.open_input(path)
+        try:
+            polygons.extend(polygonio.read_polygons(file, args.input_format or polygonio.guess_format(path)))
+        finally:
+            if file is not sys.stdin:
+                file.close()
+    if not polygons:
+        parser.error("no polygons given, use input files or --example")
+
+    fmt = args.format or guess_format(args.output)
+    if fmt == "png" and "{frame" not in args.output:
+        parser.error("PNG output needs a {frame} field in the file name")
+    if len(polygons) > 1 and args.output != "-" and "{id" not in args.output:
+        parser.error("several polygons need an {id} field in the output file name")
+
+    valid = []
+    for polygon_id, vertices, holes in polygons:
+        prepared = prepare_polygon(vertices, holes)
+        if prepared is None:
+            print(f"polygon {polygon_id} is not simple, skipped", file=sys.stderr)
+            continue
+        vertices, holes = prepared
+        if args.fit:
+            vertices, holes = fit_to_frame(vertices, args.width, args.height, holes=holes)
+        valid.append((polygon_id, vertices, holes))
+
+    start = time.perf_counter()
+    written = export(valid, args.output, fmt, args.width, args.height, args.fps, args.speed,
+                     args.edge_swapping, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    rate = written / elapsed if elapsed > 0 else float("inf")
+    print(f"{written} frames of {len(valid)} polygons in {elapsed:.2f} s, {rate:.1f} frames/s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
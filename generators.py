@@ -0,0 +1,111 @@
+"""Seeded generators of simple polygons for benchmarks, all return lists of points"""
+
+import math
+import random
+
+from point import Point
+
+def star_polygon(vertex_count, seed=0, center=(250, 250), min_radius=50, max_radius=250):
+    """Returns a random star-shaped polygon, vertices are sorted by angle around center"""
+    rnd = random.Random(seed)
+    vertices = []
+    for i in range(vertex_count):
+        radius = min_radius + rnd.random() * (max_radius - min_radius)
+        angle = 2 * math.pi * i / vertex_count
+        vertices.append(Point(center[0] + radius * math.cos(angle), center[1] + radius * math.sin(angle)))
+    return vertices
+
+def spiral_polygon(vertex_count, seed=0, center=(250, 250), turns=None, radius=250):
+    """Returns a spiral band, an outer arm going outwards and an inner arm coming back,
+    the band has about a half of the spacing between the turns of the arm as its width,
+    the seed shifts the vertices slightly along the arms"""
+    rnd = random.Random(seed)
+    arm_count = vertex_count // 2
+    turns = turns if turns is not None else max(1.0, math.sqrt(arm_count) / 4)
+    spacing = radius / (turns + 1)
+    width = spacing / 2
+    outer = []
+    inner = []
+    for i in range(arm_count):
+        # jitter keeps the vertices ordered along the arm
+        t = (i + 0.5 * rnd.random()) / arm_count
+        angle = 2 * math.pi * turns * t
+        r = spacing * turns * t + width
+        outer.append(Point(center[0] + r * math.cos(angle), center[1] + r * math.sin(angle)))
+        r -= width
+        inner.append(Point(center[0] + r * math.cos(angle), center[1] + r * math.sin(angle)))
+    vertices = outer + inner[::-1]
+    if vertex_count % 2:
+        # a vertex in the middle of the closing edge keeps the vertex count exact
+        a, b = inner[0], outer[0]
+        vertices.append(Point((a.x + b.x) / 2 + 1e-3 * width, (a.y + b.y) / 2))
+    return vertices
+
+def comb_polygon(vertex_count, seed=0, width=500, height=500):
+    """Returns a comb, a base with teeth of random lengths, a comb has many reflex vertices
+    and vertices with equal coordinates, vertices not fitting to teeth lie on a bent base"""
+    if vertex_count < 3:
+        raise ValueError("a comb needs at least 3 vertices")
+    rnd = random.Random(seed)
+    # a comb of less than 7 vertices has no teeth, just the bent base
+    tooth_count = (vertex_count - 3) // 4
+    base_count = vertex_count - 4 * tooth_count # at least 3 vertices of the base
+    base_height = height * 0.1
+    step = width / max(1, tooth_count)
+    vertices = []
+    # teeth from the left to the right, top of the base is at base_height
+    for i in range(tooth_count):
+        x0 = i * step
+        x1 = x0 + step / 2
+        top = base_height + (0.2 + 0.8 * rnd.random()) * (height - base_height)
+        vertices += [Point(x0, base_height), Point(x0, top), Point(x1, top), Point(x1, base_height)]
+    # the base from the right to the left, bent slightly to avoid collinear vertices
+    for i in range(base_count):
+        x = width - width * i / (base_count - 1)
+        vertices.append(Point(x, -base_height * math.sin(math.pi * i / (base_count - 1)) * 0.5))
+    return vertices
+
+def random_simple_polygon(vertex_count, seed=0, width=500, height=500):
+    """Returns a simple polygon through uniformly random points built by space partitioning
+    (T. Auer, M. Held, Heuristics for the Generation of Random Polygons)"""
+    rnd = random.Random(seed)
+    points = [Point(rnd.random() * width, rnd.random() * height) for _ in range(vertex_count)]
+    a, b = rnd.sample(points, 2)
+    left = [p for p in points if p is not a and p is not b and _side(a, b, p) > 0]
+    right = [p for p in points if p is not a and p is not b and _side(a, b, p) <= 0]
+    return _chain(a, b, left, rnd) + _chain(b, a, right, rnd)
+
+def _side(a, b, p):
+    return (b.x - a.x) * (p.y - a.y) - (b.y - a.y) * (p.x - a.x)
+
+def _chain(start, end, points, rnd):
+    """Returns a polygonal chain from start through all points, end is not included,
+    the points lie on one side of the segment start end"""
+    chain = []
+    stack = [(start, end, points)]
+    while stack:
+        s, e, rest = stack.pop()
+        if not rest:
+            chain.append(s)
+            continue
+        c = rest[rnd.randrange(len(rest))]
+        # a random line through c crossing the segment se splits the points between s and e
+        t = rnd.random()
+        q = Point(s.x + t * (e.x - s.x), s.y + t * (e.y - s.y))
+        s_side = _side(c, q, s) > 0
+        near_s = []
+        near_e = []
+        for p in rest:
+            if p is not c:
+                (near_s if (_side(c, q, p) > 0) == s_side else near_e).append(p)
+        # the part next to s goes first
+        stack.append((c, e, near_e))
+        stack.append((s, c, near_s))
+    return chain
+
+GENERATORS = {
+    "star": star_polygon,
+    "spiral": spiral_polygon,
+    "comb": comb_polygon,
+    "random": random_simple_polygon,
+}
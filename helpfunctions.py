@@ -1,10 +1,15 @@
+import math
+from collections import deque
+
 import point
+import predicates
+import sweepline
 
 def find_intersection(x1,y1,x2,y2,x3,y3,x4,y4):
   try:
       uA = ((x4-x3)*(y1-y3) - (y4-y3)*(x1-x3)) / ((y4-y3)*(x2-x1) - (x4-x3)*(y2-y1))
       uB = ((x2-x1)*(y1-y3) - (y2-y1)*(x1-x3)) / ((y4-y3)*(x2-x1) - (x4-x3)*(y2-y1))
-  except:
+  except ZeroDivisionError:
       return None
   if (uA >= 0 and uA <= 1 and uB >= 0 and uB <= 1):
       intersectionX = x1 + (uA * (x2-x1))
@@ -13,35 +18,55 @@ def find_intersection(x1,y1,x2,y2,x3,y3,x4,y4):
   return None
 
 def check_intersections(polygon):
-    poly = polygon[:]
-    poly.append(polygon[0])
-    tmp = poly[:]
-    intersections = []
-    for l1, l2 in zip(poly, poly[1:]):
-        tmp = tmp[1:]
-        for n1,n2 in zip(tmp,tmp[1:]):
-            ret = find_intersection(l1[0],l1[1],l2[0],l2[1],n1[0],n1[1],n2[0],n2[1])
-            if ret and (ret != l2) and (ret != l1):
-                intersections.append(ret)
-    return intersections
-
-def collinear(x1, y1, x2, y2, x3, y3): 
+    """Returns a list of self-intersections of the polygon, found by a sweep line"""
+    return sweepline.find_intersections(polygon)
+
+def collinear(x1, y1, x2, y2, x3, y3, eps=0):
+    """Checks whether the points lie on a line,
+    with eps > 0 the sine of the angle at the middle point may be up to eps"""
+    if eps == 0:
+        # the exact predicate, the float determinant may be non-zero for collinear points and vice versa
+        return predicates.collinear(point.Point(x1, y1), point.Point(x2, y2), point.Point(x3, y3))
     a = x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2)
-    return (a==0)
+    return abs(a) <= eps * math.hypot(x1 - x2, y1 - y2) * math.hypot(x3 - x2, y3 - y2)
 
-def check_points_on_line(polygon):
-    pts = []
-    poly = polygon[:]
-    poly.append(polygon[0])
-    for p1, p2, p3 in zip(poly, poly[1:], poly[2:]):
-        if(collinear(p1[0],p1[1],p2[0],p2[1],p3[0],p3[1])):
-            pts.append(p2)    
-    out = []
+def _is_duplicate(p1, p2, eps):
+    return abs(p1[0] - p2[0]) <= eps * max(1.0, abs(p1[0])) and abs(p1[1] - p2[1]) <= eps * max(1.0, abs(p1[1]))
+
+def _is_collinear(p1, p2, p3, eps):
+    return collinear(p1[0], p1[1], p2[0], p2[1], p3[0], p3[1], eps)
+
+def remove_collinear(polygon, eps=point.EPS):
+    """Removes repeated consecutive vertices and vertices lying on a line with their neighbours,
+    removals that make other vertices collinear are handled in the same pass, so it runs in O(n),
+    returns the remaining vertices and the removed ones"""
+    removed = []
+    out = deque()
     for p in polygon:
-        if p not in pts:
-            out.append(p)
-            
-    return out,pts
+        if out and _is_duplicate(out[-1], p, eps):
+            removed.append(p)
+            continue
+        while len(out) >= 2 and _is_collinear(out[-2], out[-1], p, eps):
+            removed.append(out.pop())
+        out.append(p)
+
+    # the polygon is closed, check the vertices around the seam
+    changed = True
+    while changed and len(out) >= 3:
+        changed = False
+        if _is_duplicate(out[-1], out[0], eps):
+            removed.append(out.pop())
+            changed = True
+        elif _is_collinear(out[-2], out[-1], out[0], eps):
+            removed.append(out.pop())
+            changed = True
+        elif _is_collinear(out[-1], out[0], out[1], eps):
+            removed.append(out.popleft())
+            changed = True
+    return list(out), removed
+
+def check_points_on_line(polygon):
+    return remove_collinear(polygon)
 
 def rotate_list(l, shift):
     n = []
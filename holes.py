@@ -0,0 +1,186 @@
+"""Merging of holes into the outer ring of a polygon by bridge edges
+
+The holes are processed by decreasing maximal x, a ray is cast from the rightmost
+vertex of a hole to find a visible vertex of the ring merged so far
+(D. Eberly, Triangulation by Ear Clipping), the choice of the visible vertex follows earcut.
+The ray cast and the search for vertices blocking the visibility use spatial indices,
+so merging costs about the same for hundreds of holes as for a few.
+
+The computation runs with x negated, so the ray goes to the left and
+the rightmost vertex is the leftmost one, as in earcut.
+"""
+
+from point import Point
+from spatialindex import SegmentBands, UniformGrid
+
+class _Rings:
+    """Doubly linked nodes of the rings, a node is an index to the parallel lists"""
+    def __init__(self):
+        self.x = []
+        self.y = []
+        self.source = [] # index of the vertex in the outer ring followed by the holes
+        self.prev = []
+        self.next = []
+
+    def add(self, x, y, source, last=None):
+        """Creates a node, links it after last if given"""
+        node = len(self.x)
+        self.x.append(x)
+        self.y.append(y)
+        self.source.append(source)
+        if last is None:
+            self.prev.append(node)
+            self.next.append(node)
+        else:
+            self.prev.append(last)
+            self.next.append(self.next[last])
+            self.prev[self.next[last]] = node
+            self.next[last] = node
+        return node
+
+    def point(self, node):
+        return Point(self.x[node], self.y[node])
+
+    def area(self, p, q, r):
+        x, y = self.x, self.y
+        return (y[q] - y[p]) * (x[r] - x[q]) - (x[q] - x[p]) * (y[r] - y[q])
+
+    def ring(self, ring, offset, clockwise):
+        """Links the vertices of ring (with negated x) in the requested orientation, returns the last node"""
+        signed_area = 0
+        j = len(ring) - 1
+        for i in range(len(ring)):
+            signed_area += (ring[i].x - ring[j].x) * (ring[i].y + ring[j].y)
+            j = i
+        order = range(len(ring)) if clockwise == (signed_area > 0) else range(len(ring) - 1, -1, -1)
+        last = None
+        for i in order:
+            last = self.add(-ring[i].x, ring[i].y, offset + i, last)
+        return last
+
+    def nodes(self, start):
+        node = start
+        while True:
+            yield node
+            node = self.next[node]
+            if node == start:
+                return
+
+    def locally_inside(self, a, b):
+        """Is b inside the angle of the ring at a?"""
+        prev, next = self.prev[a], self.next[a]
+        if self.area(prev, a, next) < 0:
+            return self.area(a, b, next) >= 0 and self.area(a, prev, b) >= 0
+        return self.area(a, b, prev) < 0 or self.area(a, next, b) < 0
+
+    def sector_contains_sector(self, m, p):
+        """Is the angle of the ring at p inside the angle at m, they share the vertex"""
+        return self.area(self.prev[m], m, self.prev[p]) < 0 and self.area(self.next[p], m, self.next[m]) < 0
+
+def _point_in_triangle(ax, ay, bx, by, cx, cy, px, py):
+    return ((cx - px) * (ay - py) >= (ax - px) * (cy - py) and
+            (ax - px) * (by - py) >= (bx - px) * (ay - py) and
+            (bx - px) * (cy - py) >= (cx - px) * (by - py))
+
+class _Merger:
+    def __init__(self, outer, holes):
+        self.rings = _Rings()
+        all_points = [p for ring in [outer, *holes] for p in ring]
+        xs = [-p.x for p in all_points]
+        ys = [p.y for p in all_points]
+        # bands about as high as an average edge, so an edge lies in a few bands
+        edge_height = sum(abs(ring[i].y - ring[i - 1].y) for ring in [outer, *holes] for i in range(len(ring))) / len(all_points)
+        band_count = min(len(all_points), int((max(ys) - min(ys)) / max(edge_height, 1e-9)) + 1)
+        self.edges = SegmentBands(min(ys), max(ys), band_count)
+        self.vertices = UniformGrid(min(xs), min(ys), max(xs), max(ys), len(all_points))
+
+        self.start = self.rings.ring(outer, 0, True)
+        self._index(self.rings.nodes(self.start))
+        self.hole_starts = []
+        offset = len(outer)
+        for hole in holes:
+            self.hole_starts.append(self.rings.ring(hole, offset, False))
+            offset += len(hole)
+
+    def _index(self, nodes):
+        rings = self.rings
+        for node in nodes:
+            self.vertices.insert(node, rings.point(node))
+            self.edges.insert(node, rings.point(node), rings.point(rings.next[node]))
+
+    def merge(self):
+        rings = self.rings
+        # the leftmost vertex of every hole, holes are bridged from left to right
+        queue = [min(rings.nodes(start), key=lambda node: (rings.x[node], rings.y[node])) for start in self.hole_starts]
+        queue.sort(key=lambda node: (rings.x[node], rings.y[node]))
+        for hole in queue:
+            bridge = self._find_bridge(hole)
+            if bridge is None:
+                raise ValueError("a hole is not inside the polygon")
+            self._split(bridge, hole)
+        return ([Point(-rings.x[node], rings.y[node]) for node in rings.nodes(self.start)],
+                [rings.source[node] for node in rings.nodes(self.start)])
+
+    def _find_bridge(self, hole):
+        """Returns a vertex of the merged ring visible from the hole vertex"""
+        rings = self.rings
+        x, y, next = rings.x, rings.y, rings.next
+        hx, hy = x[hole], y[hole]
+
+        # find the nearest edge crossed by a ray from the hole vertex to the left,
+        # only edges going down have the interior of the polygon on the right
+        qx = -float("inf")
+        m = None
+        for p in self.edges.query(hy):
+            q = next[p]
+            if hy <= y[p] and hy >= y[q] and y[q] != y[p]:
+                ix = x[p] + (hy - y[p]) * (x[q] - x[p]) / (y[q] - y[p])
+                if ix <= hx and ix > qx:
+                    qx = ix
+                    m = p if x[p] < x[q] else q
+                    if ix == hx:
+                        # the hole touches the edge
+                        return m
+        if m is None:
+            return None
+
+        # the endpoint is visible unless vertices lie in the triangle of the hole vertex,
+        # the ray hit and the endpoint, otherwise the one with the smallest angle to the ray is visible
+        mx, my = x[m], y[m]
+        tan_min = float("inf")
+        ax, cx = (hx, qx) if hy < my else (qx, hx)
+        for p, _ in self.vertices.query(mx, min(hy, my), hx, max(hy, my)):
+            if hx >= x[p] >= mx and hx != x[p] and _point_in_triangle(ax, hy, mx, my, cx, hy, x[p], y[p]):
+                tan = abs(hy - y[p]) / (hx - x[p])
+                if rings.locally_inside(p, hole) and (tan < tan_min or (tan == tan_min and (
+                        x[p] > x[m] or (x[p] == x[m] and rings.sector_contains_sector(m, p))))):
+                    m = p
+                    tan_min = tan
+        return m
+
+    def _split(self, a, b):
+        """Links hole vertex b to ring vertex a by two bridge edges running in opposite directions"""
+        rings = self.rings
+        hole_nodes = list(rings.nodes(b))
+        an = rings.next[a]
+        bp = rings.prev[b]
+        self.edges.remove(a, rings.point(a), rings.point(an))
+        a2 = rings.add(rings.x[a], rings.y[a], rings.source[a])
+        b2 = rings.add(rings.x[b], rings.y[b], rings.source[b])
+        rings.next[a] = b
+        rings.prev[b] = a
+        rings.next[a2] = an
+        rings.prev[an] = a2
+        rings.next[b2] = a2
+        rings.prev[a2] = b2
+        rings.next[bp] = b2
+        rings.prev[b2] = bp
+        self.edges.insert(a, rings.point(a), rings.point(b))
+        self._index(hole_nodes + [a2, b2])
+
+def merge_holes(outer, holes):
+    """Merges holes into the outer ring by bridge edges, returns (vertices, sources),
+    vertices form a single ring in which the bridge vertices repeat,
+    sources[i] is the index of vertices[i] in the outer ring followed by all holes,
+    the outer ring is clockwise (as required by EarClipping) and the holes go the other way"""
+    return _Merger(outer, holes).merge()
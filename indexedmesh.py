@@ -0,0 +1,66 @@
+"""Indexed triangle mesh in NumPy arrays
+
+The coordinates are stored once in a float64 (n, 2) array, the triangles are int32 (m, 3)
+indices to it, both C-contiguous, so they can be handed to a renderer or other mesh tools
+through the buffer protocol without copying, and saved to .npz or .npy files.
+"""
+
+import itertools
+
+import numpy as np
+
+def as_coordinates(vertices):
+    """Converts points (or a (n, 2) array) to a float64 (n, 2) array,
+    fromiter over the flattened points is several times faster than np.array for a list of points"""
+    if isinstance(vertices, np.ndarray):
+        return np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 2)
+    return np.fromiter(itertools.chain.from_iterable(vertices), dtype=np.float64, count=2 * len(vertices)).reshape(-1, 2)
+
+class IndexedMesh:
+    """Vertices (float64 (n, 2)) and triangles (int32 (m, 3) indices to the vertices)"""
+    def __init__(self, vertices, triangles):
+        self.vertices = as_coordinates(vertices)
+        self.triangles = np.ascontiguousarray(triangles, dtype=np.int32).reshape(-1, 3)
+
+    @classmethod
+    def from_mesh(cls, vertices, mesh, sources=None):
+        """Builds the arrays from a delaunay.TriangleMesh over vertices,
+        sources maps the mesh vertex indices to the indices of the vertices if given"""
+        triangles = np.fromiter(itertools.chain.from_iterable(mesh), dtype=np.int32, count=3 * len(mesh)).reshape(-1, 3)
+        if sources is not None:
+            triangles = np.asarray(sources, dtype=np.int32)[triangles]
+        return cls(vertices, triangles)
+
+    def __len__(self):
+        return len(self.triangles)
+
+    def __repr__(self):
+        return f"IndexedMesh({len(self.vertices)} vertices, {len(self.triangles)} triangles)"
+
+    def buffers(self):
+        """Returns memoryviews of the vertices and of the triangles, they share the memory of the arrays"""
+        return memoryview(self.vertices), memoryview(self.triangles)
+
+    def triangle_points(self):
+        """Returns the coordinates of the triangles as a float64 (m, 3, 2) array"""
+        return self.vertices[self.triangles]
+
+    def save(self, path):
+        """Saves the arrays to an uncompressed .npz file with vertices and triangles entries"""
+        np.savez(path, vertices=self.vertices, triangles=self.triangles)
+
+    def save_npy(self, vertices_path, triangles_path):
+        """Saves the arrays to two .npy files, they can be memory-mapped by load_npy"""
+        np.save(vertices_path, self.vertices)
+        np.save(triangles_path, self.triangles)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a mesh saved by save"""
+        with np.load(path) as data:
+            return cls(data["vertices"], data["triangles"])
+
+    @classmethod
+    def load_npy(cls, vertices_path, triangles_path, mmap_mode="r"):
+        """Loads a mesh saved by save_npy, the arrays are read-only views of the mapped files by default"""
+        return cls(np.load(vertices_path, mmap_mode=mmap_mode), np.load(triangles_path, mmap_mode=mmap_mode))
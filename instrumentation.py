@@ -0,0 +1,104 @@
+"""Switchable counters and phase timers of the triangulation engine
+
+An engine without stats runs its plain methods, the counting and timing
+wrappers are bound only to the instances of an instrumented engine,
+so the instrumentation costs nothing when it is disabled.
+"""
+
+from time import perf_counter
+
+import predicates
+from priorityqueue import EarQueue
+
+COUNTERS = (
+    "ear_tests",        # decisions whether a vertex is an ear
+    "point_tests",      # point in triangle tests of reflex vertices
+    "ear_pushes",       # insertions and updates in the queue of ears
+    "ear_pops",         # clipped ears taken from the queue
+    "stale_entries",    # outdated entries of the queue skipped or dropped
+    "swap_tests",       # checks of the Delaunay condition on an edge
+    "flips",            # swapped edges
+    "exact_fallbacks",  # predicates decided by the exact arithmetic
+)
+
+# edge swapping runs inside the clipping, so its time is included in the clipping time too,
+# partition and monotone are the phases of the monotone engine
+PHASES = ("holes", "classification", "clipping", "edge_swapping", "partition", "monotone")
+
+class EngineStats:
+    """Counters and phase times (in seconds) of one or more triangulations,
+    the times of the phases walked lazily include the work of the observer"""
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.times = dict.fromkeys(PHASES, 0.0)
+
+    def reset(self):
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.times = dict.fromkeys(PHASES, 0.0)
+
+    def as_dict(self):
+        """Returns counts and times merged to a single dict, times have a _seconds suffix"""
+        result = dict(self.counts)
+        result.update((f"{phase}_seconds", seconds) for phase, seconds in self.times.items())
+        return result
+
+    def lines(self):
+        """Returns human readable lines, used by the overlay of the application"""
+        lines = [f"{name.replace('_', ' ')}: {count}" for name, count in self.counts.items()]
+        lines += [f"{phase.replace('_', ' ')}: {seconds * 1000:.1f} ms" for phase, seconds in self.times.items()]
+        return lines
+
+    def __repr__(self):
+        return ", ".join(self.lines())
+
+    def counted(self, name, func):
+        """Returns func counting its calls to the counter name"""
+        counts = self.counts
+        def wrapper(*args, **kwargs):
+            counts[name] += 1
+            return func(*args, **kwargs)
+        return wrapper
+
+    def timed(self, phase, func):
+        """Returns func adding its run time to the phase"""
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.times[phase] += perf_counter() - start
+        return wrapper
+
+    def timed_steps(self, phase, steps):
+        """Yields the steps of a generator adding the time spent in it to the phase,
+        the time between the steps is not counted, nor are the exact predicates evaluated there"""
+        while True:
+            start = perf_counter()
+            exact = predicates.stats.exact
+            try:
+                next(steps)
+            except StopIteration:
+                return
+            finally:
+                self.times[phase] += perf_counter() - start
+                self.counts["exact_fallbacks"] += predicates.stats.exact - exact
+            yield
+
+class CountingEarQueue(EarQueue):
+    """EarQueue counting pushes, pops and the outdated entries dropped from its heap"""
+    def __init__(self, size, stats):
+        super().__init__(size)
+        self.counts = stats.counts
+
+    def push(self, vertex, quality):
+        self.counts["ear_pushes"] += 1
+        stale = self.stale
+        super().push(vertex, quality)
+        self.counts["stale_entries"] += self.stale - stale
+
+    def pop(self):
+        self.counts["ear_pops"] += 1
+        stale = self.stale
+        result = super().pop()
+        self.counts["stale_entries"] += self.stale - stale
+        return result
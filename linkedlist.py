@@ -1,3 +1,5 @@
+from array import array
+
 class DoublyLinkedItem:
     def __init__(self, value):
         self.value = value
@@ -62,3 +64,41 @@ class DoublyLinkedList:
             curr = curr.next
         return values
 
+
+class ArrayRing:
+    """Circular doubly linked list of vertex indices 0..n-1,
+    links and coordinates are stored in flat arrays instead of one object per vertex"""
+    def __init__(self, vertices):
+        n = len(vertices)
+        if n < 1:
+            raise ValueError("vertices should have at least one point")
+        self.x = array("d", (vertex[0] for vertex in vertices))
+        self.y = array("d", (vertex[1] for vertex in vertices))
+        self.prev = array("i", range(-1, n - 1))
+        self.prev[0] = n - 1
+        self.next = array("i", range(1, n + 1))
+        self.next[n - 1] = 0
+        self.head = 0
+        self.size = n
+
+    def remove(self, index):
+        """Unlinks vertex index from the ring in O(1)"""
+        if self.size <= 1:
+            raise ValueError("Invalid operation")
+        prev = self.prev[index]
+        next = self.next[index]
+        if index == self.head:
+            self.head = next
+        self.next[prev] = next
+        self.prev[next] = prev
+        self.size -= 1
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        """Yields indices of the vertices in the ring starting at head"""
+        curr = self.head
+        for _ in range(self.size):
+            yield curr
+            curr = self.next[curr]
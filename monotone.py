@@ -0,0 +1,342 @@
+"""Triangulation by a sweep-line partition into y-monotone pieces in O(n log n)
+
+The sweep goes from the top down, the diagonals removing the split and merge vertices
+split the polygon into y-monotone pieces, each piece is then triangulated in linear time
+(M. de Berg et al., Computational Geometry, chapter 3). Holes are handled as further rings
+of the sweep, they are not bridged. The result has the same format as of the ear clipping
+engine, so it can be improved by the same edge swapping, but the engine has no observer,
+the animation always uses ear clipping. Like ear clipping it returns n - 2 triangles
+(n - 2 + 2h with h holes), a repeated consecutive vertex gets a degenerate triangle.
+"""
+
+from sortedcontainers import SortedList
+
+import point
+import predicates
+from delaunay import TriangleMesh
+from indexedmesh import IndexedMesh
+
+START, END, SPLIT, MERGE, REGULAR = range(5)
+
+class _Edge:
+    """Edge from vertex index to the next vertex of its ring in the sweep status,
+    edges are ordered from the left to the right, two edges in the status at once are compared
+    at the top of the lower one, which lies in the vertical range of the other"""
+    __slots__ = ("index", "top", "bottom", "rank")
+
+    def __init__(self, index, top, bottom, rank):
+        self.index = index
+        self.top = top
+        self.bottom = bottom
+        self.rank = rank # sweep position of the top
+
+    def __lt__(self, other):
+        if self.rank > other.rank:
+            # orientation is negative for points to the left of an edge going down
+            side = predicates.orientation(other.top, other.bottom, self.top)
+            if side == 0:
+                side = predicates.orientation(other.top, other.bottom, self.bottom)
+            return side < 0
+        side = predicates.orientation(self.top, self.bottom, other.top)
+        if side == 0:
+            side = predicates.orientation(self.top, self.bottom, other.bottom)
+        return side > 0
+
+class MonotoneTriangulation:
+    def __init__(self, vertices, edge_swapping=False, holes=None, stats=None):
+        """holes are rings lying inside the polygon, the triangles index the vertices followed by the holes,
+        stats is an instrumentation.EngineStats collecting the phase times and the edge swapping counters"""
+        if len(vertices) < 3:
+            raise ValueError("vertices should have at least 3 items")
+        rings = [point.as_points(vertices)] + [point.as_points(hole) for hole in holes or ()]
+        if any(len(hole) < 3 for hole in rings[1:]):
+            raise ValueError("holes should have at least 3 items")
+        self.vertices = [p for ring in rings for p in ring]
+        self.edge_swapping = edge_swapping
+        self.stats = stats
+
+        # link the rings so the interior lies to the left, the outer ring counter-clockwise, the holes clockwise,
+        # repeated consecutive vertices are left out as their edges have zero length (like in sweepline),
+        # each of them closes a degenerate triangle with its neighbours instead, so the triangles index all the vertices
+        n = len(self.vertices)
+        self.prev = [0] * n
+        self.next = [0] * n
+        self.active = [] # indices of the linked vertices
+        self.repeated = [] # clockwise degenerate triangles of the left out vertices
+        self.rings = [] # areas of the linked rings, twice and signed
+        offset = 0
+        for k, ring in enumerate(rings):
+            kept = [not point.point_eq(ring[i], ring[i - 1]) for i in range(len(ring))]
+            ring_indices = [offset + i for i in range(len(ring)) if kept[i]]
+            if len(ring_indices) < 3:
+                raise ValueError("rings should have at least 3 distinct consecutive vertices")
+            area = _signed_area([self.vertices[i] for i in ring_indices])
+            order = list(range(len(ring)))
+            if (area > 0) != (k == 0):
+                ring_indices.reverse()
+                order.reverse()
+                area = -area
+            count = len(ring_indices)
+            for j, i in enumerate(ring_indices):
+                self.next[i] = ring_indices[(j + 1) % count]
+                self.prev[i] = ring_indices[j - 1]
+            self.active += ring_indices
+            self.rings.append(area)
+            # from a kept vertex backwards, a left out vertex gets the triangle of its predecessor and the next kept vertex
+            first = next(j for j, i in enumerate(order) if kept[i])
+            order = order[first:] + order[:first]
+            following = order[0]
+            for j in range(len(order) - 1, 0, -1):
+                if kept[order[j]]:
+                    following = order[j]
+                else:
+                    self.repeated.append((offset + following, offset + order[j], offset + order[j - 1]))
+            offset += len(ring)
+
+    def run(self):
+        """Returns a list of triangles (tuples of 3 points)"""
+        vertices = self.vertices
+        return [(vertices[a], vertices[b], vertices[c]) for a, b, c in self._triangulate()]
+
+    def run_indices(self):
+        """Returns a list of triangles as tuples of indices to the vertices followed by the holes"""
+        return list(self._triangulate())
+
+    def run_mesh(self):
+        """Returns an indexedmesh.IndexedMesh of the vertices followed by the holes"""
+        return IndexedMesh.from_mesh(self.vertices, self._triangulate())
+
+    def _triangulate(self):
+        """Triangulates the polygon, returns the resulting TriangleMesh"""
+        stats = self.stats
+        partition = self._partition if stats is None else stats.timed("partition", self._partition)
+        triangulate_piece = self._triangulate_piece if stats is None else stats.timed("monotone", self._triangulate_piece)
+
+        mesh = TriangleMesh(self.vertices)
+        self.mesh = mesh
+        if stats is not None:
+            mesh.is_illegal = stats.counted("swap_tests", mesh.is_illegal)
+            mesh.flip = stats.counted("flips", mesh.flip)
+            mesh.legalize = stats.timed("edge_swapping", mesh.legalize)
+        exact = predicates.stats.exact
+        for piece in partition():
+            for triangle in triangulate_piece(piece):
+                mesh.add(triangle)
+        for triangle in self.repeated:
+            mesh.add(triangle)
+        self._check_cover(mesh)
+        if self.edge_swapping:
+            mesh.legalize(list(mesh.edges))
+        if stats is not None:
+            stats.counts["exact_fallbacks"] += predicates.stats.exact - exact
+        return mesh
+
+    def _check_cover(self, mesh):
+        """Raises ValueError unless the triangles cover the polygon exactly once, which fails
+        for rings touching themselves or each other, the sweep does not detect all of them"""
+        if len(mesh) != len(self.vertices) - 2 + 2 * (len(self.rings) - 1):
+            raise ValueError("the triangles do not cover the polygon, the polygon is not simple")
+        vertices = self.vertices
+        covered = 0.0
+        for a, b, c in mesh:
+            (ax, ay), (bx, by), (cx, cy) = vertices[a], vertices[b], vertices[c]
+            covered += abs((bx - ax) * (cy - ay) - (cx - ax) * (by - ay))
+        # the outer ring is counter-clockwise and the holes clockwise, so the sum is the area of the polygon
+        area = sum(self.rings)
+        if abs(covered - area) > 1e-9 * max(abs(area), sum(abs(ring) for ring in self.rings)):
+            raise ValueError("the triangles do not cover the polygon, the polygon is not simple")
+
+    def _partition(self):
+        """Returns the y-monotone pieces as lists of vertex indices in counter-clockwise order"""
+        vertices, prev, next = self.vertices, self.prev, self.next
+        n = len(vertices)
+        # the sweep order, from the top down and from the left to the right at the same height
+        order = sorted(self.active, key=lambda i: (-vertices[i].y, vertices[i].x))
+        rank = [0] * n
+        for position, i in enumerate(order):
+            rank[i] = position
+        self.rank = rank
+
+        status = SortedList()
+        edges = dict() # key is the index of the first vertex of an edge in the status
+        helper = dict() # key is the index of an edge, value is the lowest vertex seen right of it
+        kinds = [REGULAR] * n
+        diagonals = []
+
+        def insert(i):
+            j = next[i]
+            edge = _Edge(i, vertices[i], vertices[j], rank[i]) if rank[i] < rank[j] else _Edge(i, vertices[j], vertices[i], rank[j])
+            edges[i] = edge
+            helper[i] = i
+            status.add(edge)
+
+        def remove(i, v):
+            """Removes the edge ending at v, connects v to its helper if it is a merge vertex"""
+            if kinds[helper[i]] == MERGE:
+                diagonals.append((v, helper[i]))
+            status.remove(edges.pop(i))
+            del helper[i]
+
+        def left_of(v):
+            """Returns the index of the edge directly left of v"""
+            p = vertices[v]
+            position = status.bisect_left(_Edge(-1, p, p, rank[v]))
+            if position == 0:
+                raise ValueError("no edge left of a vertex, the polygon is not simple")
+            return status[position - 1].index
+
+        for v in order:
+            p, q = prev[v], next[v]
+            below_p, below_q = rank[p] > rank[v], rank[q] > rank[v]
+            convex = predicates.orientation(vertices[p], vertices[v], vertices[q]) > 0
+            if below_p and below_q:
+                if convex:
+                    kinds[v] = START
+                else:
+                    kinds[v] = SPLIT
+                    e = left_of(v)
+                    diagonals.append((v, helper[e]))
+                    helper[e] = v
+                insert(v)
+            elif not below_p and not below_q:
+                kinds[v] = END if convex else MERGE
+                remove(p, v)
+                if not convex:
+                    e = left_of(v)
+                    if kinds[helper[e]] == MERGE:
+                        diagonals.append((v, helper[e]))
+                    helper[e] = v
+            elif below_q:
+                # the interior lies to the right of v
+                remove(p, v)
+                insert(v)
+            else:
+                e = left_of(v)
+                if kinds[helper[e]] == MERGE:
+                    diagonals.append((v, helper[e]))
+                helper[e] = v
+        if status:
+            raise ValueError("edges left in the sweep status, the polygon is not simple")
+        return self._pieces(diagonals)
+
+    def _pieces(self, diagonals):
+        """Returns the faces of the rings cut by the diagonals"""
+        vertices, next = self.vertices, self.next
+        if not diagonals:
+            # a hole always has a split vertex at its top, so this is a single ring, a monotone piece already
+            start = self.active[0]
+            piece = [start]
+            while next[piece[-1]] != start:
+                piece.append(next[piece[-1]])
+            return [piece]
+
+        # outgoing half-edges of the vertices with diagonals, the ring edge first
+        outgoing = dict()
+        for a, b in diagonals:
+            outgoing.setdefault(a, [next[a]]).append(b)
+            outgoing.setdefault(b, [next[b]]).append(a)
+
+        def turn(u, v):
+            """Returns the vertex following the half-edge (u, v) on the face to its left,
+            the first outgoing half-edge of v clockwise from (v, u)"""
+            candidates = outgoing.get(v)
+            if candidates is None:
+                return next[v]
+            pv, pu = vertices[v], vertices[u]
+            best = None
+            best_half = None
+            for w in candidates:
+                if w == u:
+                    continue
+                pw = vertices[w]
+                side = predicates.orientation(pv, pu, pw)
+                # 0 for directions within a half-turn clockwise from (v, u), 1 for the rest
+                half = 0 if side < 0 or (side == 0 and not _same_direction(pv, pu, pw)) else 1
+                if best is None or half < best_half or (half == best_half and predicates.orientation(pv, vertices[best], pw) > 0):
+                    best, best_half = w, half
+            return best
+
+        visited = set()
+        pieces = []
+        starts = [(a, b) for a, b in diagonals] + [(b, a) for a, b in diagonals] + [(i, next[i]) for i in self.active]
+        for start in starts:
+            if start in visited:
+                continue
+            piece = []
+            u, v = start
+            while (u, v) not in visited:
+                visited.add((u, v))
+                piece.append(u)
+                u, v = v, turn(u, v)
+            pieces.append(piece)
+        return pieces
+
+    def _triangulate_piece(self, piece):
+        """Returns clockwise triangles of a y-monotone piece given counter-clockwise"""
+        vertices = self.vertices
+        rank = self.rank
+        m = len(piece)
+        if m == 3:
+            return [_clockwise(vertices, *piece)]
+
+        top = min(range(m), key=lambda k: rank[piece[k]])
+        bottom = max(range(m), key=lambda k: rank[piece[k]])
+        # going counter-clockwise from the top leads down the left chain
+        left = [piece[(top + k) % m] for k in range((bottom - top) % m + 1)]
+        right = [piece[(top - k) % m] for k in range(1, (top - bottom) % m)]
+        on_left = set(left)
+
+        # merge the chains into the sweep order
+        merged = []
+        i = j = 0
+        while i < len(left) or j < len(right):
+            if j == len(right) or (i < len(left) and rank[left[i]] < rank[right[j]]):
+                merged.append(left[i])
+                i += 1
+            else:
+                merged.append(right[j])
+                j += 1
+
+        triangles = []
+        stack = [merged[0], merged[1]]
+        for u in merged[2:-1]:
+            if (u in on_left) != (stack[-1] in on_left):
+                # u sees all vertices on the stack, which form the other chain
+                for a, b in zip(stack, stack[1:]):
+                    triangles.append(_clockwise(vertices, u, a, b))
+                stack = [stack[-1], u]
+            else:
+                last = stack.pop()
+                sign = 1 if u in on_left else -1
+                # the diagonal to the next vertex on the stack is inside while the chain turns convex
+                while stack and sign * predicates.orientation(vertices[stack[-1]], vertices[last], vertices[u]) > 0:
+                    triangles.append(_clockwise(vertices, u, last, stack[-1]))
+                    last = stack.pop()
+                stack.append(last)
+                stack.append(u)
+        u = merged[-1]
+        for a, b in zip(stack, stack[1:]):
+            triangles.append(_clockwise(vertices, u, a, b))
+        return triangles
+
+def _clockwise(vertices, a, b, c):
+    if predicates.orientation(vertices[a], vertices[b], vertices[c]) > 0:
+        return (a, c, b)
+    return (a, b, c)
+
+def _same_direction(origin, p, q):
+    """Do the collinear points p and q lie on the same side of origin?"""
+    return (p.x - origin.x) * (q.x - origin.x) + (p.y - origin.y) * (q.y - origin.y) > 0
+
+def _signed_area(ring):
+    """Twice the signed area, positive for counter-clockwise rings"""
+    return sum(ring[i - 1].x * ring[i].y - ring[i].x * ring[i - 1].y for i in range(len(ring)))
+
+def triangulate(vertices, edge_swapping=False, holes=None, stats=None):
+    """Triangulates a simple polygon, returns a list of triangles (tuples of 3 points)"""
+    return MonotoneTriangulation(vertices, edge_swapping=edge_swapping, holes=holes, stats=stats).run()
+
+def triangulate_indices(vertices, edge_swapping=False, holes=None, stats=None):
+    """Triangulates a simple polygon, returns a list of triangles as tuples of 3 indices
+    to vertices followed by the vertices of all holes"""
+    return MonotoneTriangulation(vertices, edge_swapping=edge_swapping, holes=holes, stats=stats).run_indices()
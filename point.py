@@ -29,4 +29,10 @@ def point_scalar(p1, p2):
     return (p1.x * p2.x + p1.y * p2.y) / (point_norm(p1) * point_norm(p2))
 
 def point_eq(p1, p2):
-    return p1.x == p2.x and p1.y == p2.y
\ No newline at end of file
+    return p1.x == p2.x and p1.y == p2.y
+
+def as_points(vertices):
+    """Converts a sequence of (x, y) pairs or a (n, 2) array to a list of points"""
+    if hasattr(vertices, "tolist"):
+        vertices = vertices.tolist()
+    return [p if isinstance(p, Point) else Point(p[0], p[1]) for p in vertices]
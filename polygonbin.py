@@ -0,0 +1,122 @@
+"""Compact binary container of polygons or triangulations, read through numpy.memmap
+
+Layout (little endian):
+    header  - magic b"VGEPOLY\\0", version uint32, kind uint32, record count uint64, offsets position uint64
+    data    - packed records, float64 (x, y) pairs for polygons, int32 index triples for triangles
+    offsets - uint64[count + 1], start of every record in the data, in items (vertices or triangles)
+"""
+
+import struct
+
+import numpy as np
+
+from point import Point
+
+MAGIC = b"VGEPOLY\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+
+POLYGONS = 0
+TRIANGLES = 1
+
+_ITEM_TYPES = {
+    POLYGONS: (np.dtype("<f8"), 2),
+    TRIANGLES: (np.dtype("<i4"), 3),
+}
+
+EXTENSIONS = {
+    POLYGONS: ".polybin",
+    TRIANGLES: ".tribin",
+}
+
+class DatasetWriter:
+    """Appends records to a binary container, the offsets are written on close"""
+    def __init__(self, path, kind=POLYGONS):
+        self.kind = kind
+        self.dtype, self.width = _ITEM_TYPES[kind]
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, kind, 0, 0))
+        self.offsets = [0]
+
+    def append(self, record):
+        """Appends a polygon (sequence of points or (n, 2) array) or triangles ((m, 3) indices)"""
+        data = np.asarray(record, dtype=self.dtype).reshape(-1, self.width)
+        self.file.write(data.tobytes())
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def close(self):
+        offsets_position = self.file.tell()
+        self.file.write(np.asarray(self.offsets, dtype="<u8").tobytes())
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.kind, len(self.offsets) - 1, offsets_position))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Dataset:
+    """Read-only view of a binary container, records are zero-copy views of the mapped file,
+    the file is mapped lazily so the object is cheap to send to worker processes"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            magic, version, kind, count, offsets_position = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a polygon dataset")
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported version {version}")
+        self.kind = kind
+        self.count = count
+        self.offsets_position = offsets_position
+        self._data = None
+        self._offsets = None
+
+    def _map(self):
+        dtype, width = _ITEM_TYPES[self.kind]
+        self._offsets = np.memmap(self.path, dtype="<u8", mode="r", offset=self.offsets_position, shape=(self.count + 1,))
+        items = int(self._offsets[-1])
+        if items:
+            self._data = np.memmap(self.path, dtype=dtype, mode="r", offset=HEADER.size, shape=(items, width))
+        else:
+            self._data = np.empty((0, width), dtype=dtype)
+
+    def __getstate__(self):
+        # the mapping is recreated in the process that unpickles the dataset
+        state = self.__dict__.copy()
+        state["_data"] = None
+        state["_offsets"] = None
+        return state
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        """Returns record i as a view into the mapped file"""
+        if self._data is None:
+            self._map()
+        if not -self.count <= i < self.count:
+            raise IndexError("record index out of range")
+        i %= self.count
+        return self._data[int(self._offsets[i]):int(self._offsets[i + 1])]
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def points(self, i):
+        """Returns polygon i as a list of points like in examples.py"""
+        return [Point(x, y) for x, y in self[i].tolist()]
+
+def write_polygons(path, polygons):
+    """Writes polygons given as lists of points (or (n, 2) arrays) to a binary container"""
+    with DatasetWriter(path, POLYGONS) as writer:
+        for polygon in polygons:
+            writer.append(polygon)
+
+def read_polygons(path):
+    """Reads all polygons of a binary container as lists of points"""
+    dataset = Dataset(path)
+    return [dataset.points(i) for i in range(len(dataset))]
@@ -0,0 +1,175 @@
+"""Reading polygons from text formats and writing triangulations,
+all readers stream (id, vertices, holes) records, vertices are lists of points,
+holes are lists of such lists, empty for polygons without holes,
+a line that cannot be read raises ValueError, or is yielded as a BadRecord when the errors are reported"""
+
+import csv
+import json
+import re
+import sys
+from collections import namedtuple
+
+from point import Point
+
+FORMATS = ("json", "csv", "wkt")
+
+# a polygon that could not be read, yielded in place of its record when the errors are reported
+BadRecord = namedtuple("BadRecord", ["id", "error"])
+
+# errors of malformed input, a missing key, a wrong structure or a missing coordinate
+_READ_ERRORS = (ValueError, TypeError, KeyError, IndexError)
+
+def _bad_record(errors, polygon_id, where, error):
+    """Returns the BadRecord of a polygon that could not be read if errors is "report", raises ValueError otherwise"""
+    message = f"{where}: {type(error).__name__}: {error}"
+    if errors == "report":
+        return BadRecord(polygon_id, message)
+    raise ValueError(message) from error
+
+def guess_format(path):
+    """Guesses the format from the file extension, JSON Lines is the default"""
+    for fmt in FORMATS:
+        if path.lower().endswith("." + fmt):
+            return fmt
+    return "json"
+
+def open_input(path):
+    """Opens a file for reading, "-" stands for stdin"""
+    if path == "-":
+        return sys.stdin
+    return open(path, newline="")
+
+def open_output(path):
+    """Opens a file for writing, "-" stands for stdout"""
+    if path == "-":
+        return sys.stdout
+    return open(path, "w", newline="")
+
+def read_polygons(file, fmt, errors="raise"):
+    """Streams the records of file in format fmt, errors is "raise" to stop at the first line
+    that cannot be read, or "report" to yield a BadRecord for it and continue"""
+    if errors not in ("raise", "report"):
+        raise ValueError(f"unknown errors {errors}, expected raise or report")
+    if fmt == "json":
+        return read_json(file, errors)
+    if fmt == "csv":
+        return read_csv(file, errors)
+    if fmt == "wkt":
+        return read_wkt(file, errors)
+    raise ValueError(f"unknown format {fmt}, expected one of {', '.join(FORMATS)}")
+
+def _json_record(item, default_id):
+    """Accepts either a list of [x, y] pairs or an object with "vertices" and optional "id" and "holes" """
+    if isinstance(item, dict):
+        holes = [[Point(float(x), float(y)) for x, y in hole] for hole in item.get("holes", ())]
+        return item.get("id", default_id), [Point(float(x), float(y)) for x, y in item["vertices"]], holes
+    return default_id, [Point(float(x), float(y)) for x, y in item], []
+
+def _json_item(item, default_id, errors, where):
+    try:
+        return _json_record(item, default_id)
+    except _READ_ERRORS as e:
+        return _bad_record(errors, item.get("id", default_id) if isinstance(item, dict) else default_id, where, e)
+
+def read_json(file, errors="raise"):
+    """Reads JSON Lines, one polygon per line, or a single JSON array of polygons,
+    the array has to be loaded at once, JSON Lines are streamed"""
+    first = file.read(1)
+    while first and first.isspace():
+        first = file.read(1)
+    if first == "[":
+        # a JSON array of polygons or a single polygon as a list of pairs
+        try:
+            data = json.loads(first + file.read())
+        except ValueError as e:
+            yield _bad_record(errors, None, "the JSON array", e)
+            return
+        if data and isinstance(data[0], list) and data[0] and not isinstance(data[0][0], list):
+            data = [data]
+        for i, item in enumerate(data):
+            yield _json_item(item, i, errors, f"item {i}")
+        return
+    for i, line in enumerate(_prepend(first, file)):
+        if line.strip():
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                yield _bad_record(errors, i, f"line {i + 1}", e)
+                continue
+            yield _json_item(item, i, errors, f"line {i + 1}")
+
+def _prepend(first, file):
+    """Yields lines of file as if first was not read from it yet"""
+    rest = file.readline()
+    yield first + rest
+    yield from file
+
+def read_csv(file, errors="raise"):
+    """Reads rows "id,x,y", consecutive rows with the same id form a polygon,
+    an optional header on the first line is skipped, any other row that cannot be read fails its polygon"""
+    reader = csv.reader(file)
+    current_id = None
+    vertices = []
+    bad = None # BadRecord of the current polygon
+    for row in reader:
+        if not row:
+            continue
+        try:
+            vertex = Point(float(row[1]), float(row[2]))
+        except (ValueError, IndexError) as e:
+            if isinstance(e, ValueError) and reader.line_num == 1:
+                # header
+                continue
+            vertex = _bad_record(errors, row[0], f"line {reader.line_num}", e)
+        if row[0] != current_id:
+            if vertices or bad is not None:
+                yield bad or (current_id, vertices, [])
+            current_id, vertices, bad = row[0], [], None
+        if isinstance(vertex, BadRecord):
+            bad = bad or vertex
+        else:
+            vertices.append(vertex)
+    if vertices or bad is not None:
+        yield bad or (current_id, vertices, [])
+
+_WKT_RING = re.compile(r"\(([^()]*)\)")
+
+def parse_wkt(text):
+    """Parses "POLYGON ((x y, x y, ...))", returns a list of rings, the first one is the outline,
+    the closing vertex repeating the first one is dropped"""
+    if not text.strip().upper().startswith("POLYGON"):
+        raise ValueError(f"expected a WKT polygon, got {text.strip()[:20]!r}")
+    rings = []
+    for ring_text in _WKT_RING.findall(text):
+        ring = [Point(*map(float, pair.split())) for pair in ring_text.split(",")]
+        if len(ring) > 1 and ring[0] == ring[-1]:
+            ring.pop()
+        rings.append(ring)
+    if not rings:
+        raise ValueError("a WKT polygon without rings")
+    return rings
+
+def read_wkt(file, errors="raise"):
+    """Reads one WKT polygon per line, optionally prefixed with "id;", the rings after the first one are holes"""
+    for i, line in enumerate(file):
+        if not line.strip():
+            continue
+        polygon_id = i
+        if ";" in line:
+            polygon_id, line = line.split(";", 1)
+        try:
+            rings = parse_wkt(line)
+        except _READ_ERRORS as e:
+            yield _bad_record(errors, polygon_id, f"line {i + 1}", e)
+            continue
+        yield polygon_id, rings[0], rings[1:]
+
+def write_triangles(file, polygon_id, triangles=None, error=None):
+    """Writes one JSON Lines record with triangle indices or with an error message"""
+    record = {"id": polygon_id}
+    if error is not None:
+        record["error"] = error
+    else:
+        record["triangles"] = [list(triangle) for triangle in triangles]
+    file.write(json.dumps(record, separators=(",", ":")))
+    file.write("\n")
@@ -0,0 +1,120 @@
+"""Filtered geometric predicates with exact results
+
+The determinants are computed in floats first, the result is returned when its sign
+is certain by the error bound of J. R. Shewchuk (Adaptive Precision Floating-Point
+Arithmetic and Fast Robust Geometric Predicates), otherwise the determinant
+is recomputed exactly with fractions. The exact fallbacks are counted in stats.
+"""
+
+from fractions import Fraction
+
+# relative error bound of the float orientation determinant
+_EPSILON = 2.0 ** -53
+_CCW_BOUND = (3.0 + 16.0 * _EPSILON) * _EPSILON
+
+class PredicateStats:
+    """Number of the predicates decided by the exact arithmetic"""
+    def __init__(self):
+        self.exact = 0
+
+    def reset(self):
+        self.exact = 0
+
+    def __repr__(self):
+        return f"exact fallbacks: {self.exact}"
+
+stats = PredicateStats()
+
+def _exact_orientation(ax, ay, bx, by, cx, cy):
+    stats.exact += 1
+    ax, ay, bx, by, cx, cy = map(Fraction, (ax, ay, bx, by, cx, cy))
+    det = (ax - cx) * (by - cy) - (bx - cx) * (ay - cy)
+    return (det > 0) - (det < 0)
+
+def orientation(a, b, c):
+    """Does c lie on, to the left of, or to the right of ab vector?
+    Returns a number with the exact sign of (a.x-c.x)*(b.y-c.y)-(b.x-c.x)*(a.y-c.y)"""
+    cx, cy = c
+    detleft = (a[0] - cx) * (b[1] - cy)
+    detright = (b[0] - cx) * (a[1] - cy)
+    det = detleft - detright
+    # |detleft| + |detright| is |detleft + detright| unless the sign of det is certain anyway
+    bound = _CCW_BOUND * abs(detleft + detright)
+    if det >= bound or -det >= bound:
+        return det
+    return _exact_orientation(a[0], a[1], b[0], b[1], cx, cy)
+
+def point_in_triangle(p, a, b, c):
+    """Does p lie inside the triangle or on its boundary? The triangle may have any orientation,
+    a degenerate triangle contains the points of its segment"""
+    px, py = p
+    adx, ady = a[0] - px, a[1] - py
+    bdx, bdy = b[0] - px, b[1] - py
+    cdx, cdy = c[0] - px, c[1] - py
+    # orientations of p to the edges ab, bc and ca, same as orientation(a, b, p) etc.,
+    # p is outside as soon as two of them have opposite signs
+    l, r = adx * bdy, bdx * ady
+    d1 = l - r
+    bound = _CCW_BOUND * abs(l + r)
+    if -bound < d1 < bound:
+        d1 = _exact_orientation(a[0], a[1], b[0], b[1], px, py)
+    l, r = bdx * cdy, cdx * bdy
+    d2 = l - r
+    bound = _CCW_BOUND * abs(l + r)
+    if -bound < d2 < bound:
+        d2 = _exact_orientation(b[0], b[1], c[0], c[1], px, py)
+    if (d1 < 0 and d2 > 0) or (d1 > 0 and d2 < 0):
+        return False
+    l, r = cdx * ady, adx * cdy
+    d3 = l - r
+    bound = _CCW_BOUND * abs(l + r)
+    if -bound < d3 < bound:
+        d3 = _exact_orientation(c[0], c[1], a[0], a[1], px, py)
+    has_negative = d1 < 0 or d2 < 0 or d3 < 0
+    has_positive = d1 > 0 or d2 > 0 or d3 > 0
+    if has_negative and has_positive:
+        return False
+    if has_negative or has_positive:
+        return True
+    # all points on a line
+    return (min(a[0], b[0], c[0]) <= px <= max(a[0], b[0], c[0]) and
+            min(a[1], b[1], c[1]) <= py <= max(a[1], b[1], c[1]))
+
+def collinear(a, b, c):
+    """Do the points lie exactly on a line?"""
+    return orientation(a, b, c) == 0
+
+_ICC_BOUND = (10.0 + 96.0 * _EPSILON) * _EPSILON
+
+def _exact_incircle(a, b, c, d):
+    stats.exact += 1
+    dx, dy = Fraction(d[0]), Fraction(d[1])
+    adx, ady = Fraction(a[0]) - dx, Fraction(a[1]) - dy
+    bdx, bdy = Fraction(b[0]) - dx, Fraction(b[1]) - dy
+    cdx, cdy = Fraction(c[0]) - dx, Fraction(c[1]) - dy
+    det = ((adx * adx + ady * ady) * (bdx * cdy - cdx * bdy) +
+           (bdx * bdx + bdy * bdy) * (cdx * ady - adx * cdy) +
+           (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady))
+    return (det > 0) - (det < 0)
+
+def incircle(a, b, c, d):
+    """Returns a number with the exact sign of the circumcircle determinant, it is positive
+    when d lies inside the circle through a, b, c and orientation(a, b, c) is positive,
+    negative when d lies outside, the signs swap for the other orientation"""
+    dx, dy = d
+    adx, ady = a[0] - dx, a[1] - dy
+    bdx, bdy = b[0] - dx, b[1] - dy
+    cdx, cdy = c[0] - dx, c[1] - dy
+    bdxcdy, cdxbdy = bdx * cdy, cdx * bdy
+    cdxady, adxcdy = cdx * ady, adx * cdy
+    adxbdy, bdxady = adx * bdy, bdx * ady
+    alift = adx * adx + ady * ady
+    blift = bdx * bdx + bdy * bdy
+    clift = cdx * cdx + cdy * cdy
+    det = alift * (bdxcdy - cdxbdy) + blift * (cdxady - adxcdy) + clift * (adxbdy - bdxady)
+    permanent = ((abs(bdxcdy) + abs(cdxbdy)) * alift + (abs(cdxady) + abs(adxcdy)) * blift +
+                 (abs(adxbdy) + abs(bdxady)) * clift)
+    bound = _ICC_BOUND * permanent
+    if det > bound or -det > bound:
+        return det
+    return _exact_incircle(a, b, c, d)
@@ -0,0 +1,59 @@
+"""Priority queue of ears, a binary heap with lazy deletion"""
+
+import heapq
+
+class EarQueue:
+    """Ears (vertex indices 0..size-1) ordered by their quality, the best (largest) first,
+    ties go to the most recently pushed ear.
+    Every push gets a new generation, a heap entry is valid only while its generation
+    is the current generation of its vertex, so updates and removals just leave the old
+    entries in the heap, they are skipped when they reach the top"""
+    def __init__(self, size):
+        self.heap = [] # entries (-quality, -generation, vertex)
+        self.generations = [0] * size # generation of the valid entry of every vertex, 0 for none
+        self.generation = 0
+        self.count = 0 # number of queued vertices
+        self.stale = 0 # number of invalid entries dropped from the heap so far
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, vertex):
+        return self.generations[vertex] != 0
+
+    def push(self, vertex, quality):
+        """Queues the vertex, or updates its quality if it is queued already, in O(log n)"""
+        if self.generations[vertex] == 0:
+            self.count += 1
+        self.generation += 1
+        self.generations[vertex] = self.generation
+        heapq.heappush(self.heap, (-quality, -self.generation, vertex))
+        if len(self.heap) > 2 * self.count + 64:
+            self._compact()
+
+    def discard(self, vertex):
+        """Removes the vertex from the queue if it is there, in O(1)"""
+        if self.generations[vertex] != 0:
+            self.generations[vertex] = 0
+            self.count -= 1
+
+    def pop(self):
+        """Removes and returns (quality, vertex) of the best ear"""
+        heap = self.heap
+        generations = self.generations
+        while heap:
+            quality, generation, vertex = heapq.heappop(heap)
+            if generations[vertex] == -generation:
+                generations[vertex] = 0
+                self.count -= 1
+                return -quality, vertex
+            self.stale += 1
+        raise KeyError("pop from an empty queue")
+
+    def _compact(self):
+        """Drops the invalid entries, keeps the heap at most about twice as large as the queue"""
+        generations = self.generations
+        valid = [entry for entry in self.heap if generations[entry[2]] == -entry[1]]
+        self.stale += len(self.heap) - len(valid)
+        heapq.heapify(valid)
+        self.heap = valid
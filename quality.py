@@ -0,0 +1,172 @@
+"""Quality metrics of triangles computed without trigonometry
+
+A metric maps a triangle to a number, the larger the better, it is a monotone function
+of the measured property computed from squared edge lengths and dot and cross products:
+    min_angle     sin^2 of the smallest angle (the smallest angle is at most 60 degrees)
+    max_angle     cos(a) * |cos(a)| of the largest angle a
+    aspect_ratio  4 * sqrt(3) * area / (sum of squared edge lengths), 1 for an equilateral triangle
+The scalar functions take three points and serve the incremental updates of the engine,
+the batch functions evaluate all triangles of a mesh at once with NumPy.
+"""
+
+import math
+
+import numpy as np
+
+import predicates
+
+def _edges(a, b, c):
+    """Returns the squared lengths of the edges opposite to a, b, c, and the doubled signed area"""
+    abx, aby = b[0] - a[0], b[1] - a[1]
+    bcx, bcy = c[0] - b[0], c[1] - b[1]
+    cax, cay = a[0] - c[0], a[1] - c[1]
+    return bcx * bcx + bcy * bcy, cax * cax + cay * cay, abx * abx + aby * aby, abx * bcy - aby * bcx
+
+def min_angle(a, b, c):
+    """sin^2 of the smallest angle, 0 for a degenerate triangle"""
+    la, lb, lc, cross = _edges(a, b, c)
+    # the smallest angle lies opposite to the shortest edge, between the other two
+    if la <= lb and la <= lc:
+        denominator = lb * lc
+    elif lb <= lc:
+        denominator = la * lc
+    else:
+        denominator = la * lb
+    return cross * cross / denominator if denominator else 0.0
+
+def max_angle(a, b, c):
+    """cos(a) * |cos(a)| of the largest angle a, -1 for a degenerate triangle"""
+    la, lb, lc, _ = _edges(a, b, c)
+    # the largest angle lies opposite to the longest edge
+    if la >= lb and la >= lc:
+        apex, p, q = a, b, c
+    elif lb >= lc:
+        apex, p, q = b, c, a
+    else:
+        apex, p, q = c, a, b
+    ux, uy = p[0] - apex[0], p[1] - apex[1]
+    vx, vy = q[0] - apex[0], q[1] - apex[1]
+    denominator = (ux * ux + uy * uy) * (vx * vx + vy * vy)
+    if not denominator:
+        return -1.0
+    dot = ux * vx + uy * vy
+    return dot * abs(dot) / denominator
+
+_ASPECT_SCALE = 2 * math.sqrt(3)
+
+def aspect_ratio(a, b, c):
+    """Normalized ratio of the area to the squared edge lengths, 1 for an equilateral triangle, 0 for a degenerate one"""
+    la, lb, lc, cross = _edges(a, b, c)
+    total = la + lb + lc
+    return _ASPECT_SCALE * abs(cross) / total if total else 0.0
+
+def in_circumcircle(a, b, c, d):
+    """Does d lie strictly inside the circumcircle of triangle a, b, c (of any orientation)?
+    The test is exact, see predicates.incircle"""
+    orientation = predicates.orientation(a, b, c)
+    if orientation == 0:
+        return False
+    det = predicates.incircle(a, b, c, d)
+    return det > 0 if orientation > 0 else det < 0
+
+METRICS = {
+    "min_angle": min_angle,
+    "max_angle": max_angle,
+    "aspect_ratio": aspect_ratio,
+}
+
+def _batch_edges(vertices, triangles):
+    """Batch version of _edges, vertices is a (n, 2) array, triangles a (m, 3) array of indices"""
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    a, b, c = (vertices[triangles[:, i]] for i in range(3))
+    ab, bc, ca = b - a, c - b, a - c
+    lengths = np.stack(((bc * bc).sum(axis=1), (ca * ca).sum(axis=1), (ab * ab).sum(axis=1)), axis=1)
+    cross = ab[:, 0] * bc[:, 1] - ab[:, 1] * bc[:, 0]
+    return (a, b, c), lengths, cross
+
+def batch_min_angle(vertices, triangles):
+    """min_angle of every triangle"""
+    _, lengths, cross = _batch_edges(vertices, triangles)
+    lengths = np.sort(lengths, axis=1)
+    denominator = lengths[:, 1] * lengths[:, 2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, cross * cross / denominator, 0.0)
+
+def batch_max_angle(vertices, triangles):
+    """max_angle of every triangle"""
+    points, lengths, _ = _batch_edges(vertices, triangles)
+    apex_index = np.argmax(lengths, axis=1)
+    rows = np.arange(len(apex_index))
+    stacked = np.stack(points, axis=1) # (m, 3, 2)
+    apex = stacked[rows, apex_index]
+    u = stacked[rows, (apex_index + 1) % 3] - apex
+    v = stacked[rows, (apex_index + 2) % 3] - apex
+    denominator = (u * u).sum(axis=1) * (v * v).sum(axis=1)
+    dot = (u * v).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, dot * np.abs(dot) / denominator, -1.0)
+
+def batch_aspect_ratio(vertices, triangles):
+    """aspect_ratio of every triangle"""
+    _, lengths, cross = _batch_edges(vertices, triangles)
+    total = lengths.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, _ASPECT_SCALE * np.abs(cross) / total, 0.0)
+
+BATCH_METRICS = {
+    "min_angle": batch_min_angle,
+    "max_angle": batch_max_angle,
+    "aspect_ratio": batch_aspect_ratio,
+}
+
+def batch_non_delaunay_edges(vertices, triangles):
+    """Returns the number of inner edges whose opposite vertex lies inside the circumcircle of the other triangle,
+    it is evaluated in floats, the engine decides the flips exactly"""
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    if len(triangles) < 2:
+        return 0
+    # every triangle contributes its three edges with the opposite vertex
+    starts = triangles.reshape(-1)
+    ends = np.roll(triangles, -1, axis=1).reshape(-1)
+    apexes = np.roll(triangles, -2, axis=1).reshape(-1)
+    owners = np.repeat(np.arange(len(triangles)), 3)
+    keys = np.minimum(starts, ends) * len(vertices) + np.maximum(starts, ends)
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    shared = np.flatnonzero(keys[1:] == keys[:-1])
+    first, second = order[shared], order[shared + 1]
+
+    a, b, c = (vertices[triangles[owners[first], i]] for i in range(3))
+    d = vertices[apexes[second]]
+    ad, bd, cd = a - d, b - d, c - d
+    det = ((ad * ad).sum(axis=1) * (bd[:, 0] * cd[:, 1] - cd[:, 0] * bd[:, 1]) +
+           (bd * bd).sum(axis=1) * (cd[:, 0] * ad[:, 1] - ad[:, 0] * cd[:, 1]) +
+           (cd * cd).sum(axis=1) * (ad[:, 0] * bd[:, 1] - bd[:, 0] * ad[:, 1]))
+    orientation = (a[:, 0] - c[:, 0]) * (b[:, 1] - c[:, 1]) - (b[:, 0] - c[:, 0]) * (a[:, 1] - c[:, 1])
+    # a relative tolerance keeps cocircular quadrilaterals (like rectangles) Delaunay
+    scale = np.maximum.reduce([(ad * ad).sum(axis=1), (bd * bd).sum(axis=1), (cd * cd).sum(axis=1)])
+    return int(np.count_nonzero(det * np.sign(orientation) > 1e-12 * scale * scale))
+
+def mesh_stats(vertices, triangles):
+    """Returns a dict of quality statistics of a triangulation,
+    vertices are points or a (n, 2) array, triangles are index triples like from triangulate_indices,
+    the angles are in degrees"""
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    if len(triangles) == 0:
+        return {"triangles": 0}
+    min_angles = np.degrees(np.arcsin(np.sqrt(batch_min_angle(vertices, triangles))))
+    cos_max = batch_max_angle(vertices, triangles)
+    max_angles = np.degrees(np.arccos(np.sign(cos_max) * np.sqrt(np.abs(cos_max))))
+    aspect = batch_aspect_ratio(vertices, triangles)
+    return {
+        "triangles": len(triangles),
+        "min_angle": float(min_angles.min()),
+        "mean_min_angle": float(min_angles.mean()),
+        "max_angle": float(max_angles.max()),
+        "mean_max_angle": float(max_angles.mean()),
+        "min_aspect_ratio": float(aspect.min()),
+        "mean_aspect_ratio": float(aspect.mean()),
+        "non_delaunay_edges": batch_non_delaunay_edges(vertices, triangles),
+    }
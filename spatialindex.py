@@ -0,0 +1,186 @@
+"""Spatial index of points used to speed up point in triangle queries"""
+
+import bisect
+import math
+
+# boxes of at most this many cells are walked cell by cell, which is cheaper for them than bisecting the rows
+SMALL_QUERY = 32
+
+class UniformGrid:
+    """Uniform grid of points, supports insertion, removal and bounding box queries,
+    every point is stored under a unique hashable key"""
+
+    def __init__(self, xmin, ymin, xmax, ymax, cell_count):
+        self.xmin = xmin
+        self.ymin = ymin
+        width = max(xmax - xmin, 1e-9)
+        height = max(ymax - ymin, 1e-9)
+        # square cells, about cell_count of them cover the bounding box
+        self.cell_size = math.sqrt(width * height / max(cell_count, 1))
+        self.columns = int(width / self.cell_size) + 1
+        self.rows = int(height / self.cell_size) + 1
+        # y range of the inserted points, the first and the last row hold the points beyond the grid too
+        self.ylow = ymin
+        self.yhigh = ymax
+        self.cells = dict() # key is (column, row) value is a dict from point keys to points
+        self.rows_occupied = [] # sorted occupied rows
+        self.row_columns = dict() # key is a row value is the sorted list of its occupied columns
+        self.size = 0
+
+    @classmethod
+    def from_points(cls, items):
+        """Builds a grid from a list of (key, point) pairs, with about one point per cell"""
+        if not items:
+            return cls(0, 0, 1, 1, 1)
+        xs = [p.x for _, p in items]
+        ys = [p.y for _, p in items]
+        grid = cls(min(xs), min(ys), max(xs), max(ys), len(items))
+        # in the order of the rows and columns the sorted lists are only appended to
+        for key, p in sorted(items, key=lambda item: grid._cell(item[1].x, item[1].y)[::-1]):
+            grid.insert(key, p)
+        return grid
+
+    def _cell(self, x, y):
+        column = min(max(int((x - self.xmin) / self.cell_size), 0), self.columns - 1)
+        row = min(max(int((y - self.ymin) / self.cell_size), 0), self.rows - 1)
+        return column, row
+
+    def insert(self, key, p):
+        self.ylow = min(self.ylow, p.y)
+        self.yhigh = max(self.yhigh, p.y)
+        cell_key = self._cell(p.x, p.y)
+        cell = self.cells.get(cell_key)
+        if cell is None:
+            cell = self.cells[cell_key] = dict()
+            column, row = cell_key
+            columns = self.row_columns.get(row)
+            if columns is None:
+                columns = self.row_columns[row] = []
+                bisect.insort(self.rows_occupied, row)
+            bisect.insort(columns, column)
+        if key not in cell:
+            cell[key] = p
+            self.size += 1
+
+    def remove(self, key, p):
+        """Removes the point stored under key, does nothing if it is not present"""
+        cell_key = self._cell(p.x, p.y)
+        cell = self.cells.get(cell_key)
+        if cell is not None and key in cell:
+            del cell[key]
+            self.size -= 1
+            if not cell:
+                del self.cells[cell_key]
+                column, row = cell_key
+                columns = self.row_columns[row]
+                del columns[bisect.bisect_left(columns, column)]
+                if not columns:
+                    del self.row_columns[row]
+                    del self.rows_occupied[bisect.bisect_left(self.rows_occupied, row)]
+
+    def __len__(self):
+        return self.size
+
+    def _rows(self, r0, r1):
+        """Returns the occupied rows from r0 to r1"""
+        rows = self.rows_occupied
+        return rows[bisect.bisect_left(rows, r0):bisect.bisect_right(rows, r1)]
+
+    def _row_cells(self, row, c0, c1):
+        """Yields the occupied cells of a row from column c0 to c1"""
+        columns = self.row_columns[row]
+        cells = self.cells
+        for i in range(bisect.bisect_left(columns, c0), bisect.bisect_right(columns, c1)):
+            yield cells[(columns[i], row)]
+
+    def query(self, xmin, ymin, xmax, ymax):
+        """Yields (key, point) pairs of points inside the bounding box,
+        only the occupied cells of a large box are walked"""
+        if not self.cells:
+            return
+        c0, r0 = self._cell(xmin, ymin)
+        c1, r1 = self._cell(xmax, ymax)
+        if (c1 - c0 + 1) * (r1 - r0 + 1) <= SMALL_QUERY:
+            cells = [self.cells.get((c, r)) for c in range(c0, c1 + 1) for r in range(r0, r1 + 1)]
+        else:
+            cells = (cell for row in self._rows(r0, r1) for cell in self._row_cells(row, c0, c1))
+        for cell in cells:
+            if cell is None:
+                continue
+            for key, p in cell.items():
+                if xmin <= p.x <= xmax and ymin <= p.y <= ymax:
+                    yield key, p
+
+    def query_triangle(self, v0, v1, v2):
+        """Yields (key, point) pairs of points inside the bounding box of the triangle,
+        except points in cells away from the triangle, every row of a large box is walked only in the columns
+        the triangle spans in it, so a long thin triangle costs about its length in cells, not its bounding box"""
+        xmin, xmax = min(v0.x, v1.x, v2.x), max(v0.x, v1.x, v2.x)
+        ymin, ymax = min(v0.y, v1.y, v2.y), max(v0.y, v1.y, v2.y)
+        if not self.cells:
+            return
+        c0, r0 = self._cell(xmin, ymin)
+        c1, r1 = self._cell(xmax, ymax)
+        if (c1 - c0 + 1) * (r1 - r0 + 1) <= SMALL_QUERY:
+            yield from self.query(xmin, ymin, xmax, ymax)
+            return
+        size = self.cell_size
+        # the bands and spans are widened a bit as the cells are computed in floats
+        margin = 1e-6 * size
+        for row in self._rows(r0, r1):
+            low = self.ylow if row == 0 else self.ymin + row * size
+            high = self.yhigh if row == self.rows - 1 else self.ymin + (row + 1) * size
+            span = _band_span(v0, v1, v2, max(ymin, low - margin), min(ymax, high + margin))
+            if span is None:
+                first, last = c0, c1
+            else:
+                first = max(c0, min(int((span[0] - margin - self.xmin) / size), self.columns - 1))
+                last = min(c1, max(int((span[1] + margin - self.xmin) / size), 0))
+            for cell in self._row_cells(row, first, last):
+                for key, p in cell.items():
+                    if xmin <= p.x <= xmax and ymin <= p.y <= ymax:
+                        yield key, p
+
+def _band_span(v0, v1, v2, low, high):
+    """Returns the x range of the triangle within the horizontal band low <= y <= high, None if they do not meet"""
+    xs = [p.x for p in (v0, v1, v2) if low <= p.y <= high]
+    for p, q in ((v0, v1), (v1, v2), (v2, v0)):
+        for y in (low, high):
+            if (p.y - y) * (q.y - y) < 0:
+                xs.append(p.x + (y - p.y) * (q.x - p.x) / (q.y - p.y))
+    if not xs:
+        return None
+    return min(xs), max(xs)
+
+class SegmentBands:
+    """Horizontal bands of segments, finds candidate segments crossed by a horizontal line,
+    every segment is stored under a unique hashable key in all bands its y range overlaps"""
+
+    def __init__(self, ymin, ymax, band_count):
+        self.ymin = ymin
+        self.band_height = max(ymax - ymin, 1e-9) / max(band_count, 1)
+        self.band_count = max(band_count, 1)
+        self.bands = dict() # key is the band index value is a set of segment keys
+
+    def _bands(self, p, q):
+        first = self._band(min(p.y, q.y))
+        last = self._band(max(p.y, q.y))
+        return range(first, last + 1)
+
+    def _band(self, y):
+        return min(max(int((y - self.ymin) / self.band_height), 0), self.band_count - 1)
+
+    def insert(self, key, p, q):
+        for band in self._bands(p, q):
+            self.bands.setdefault(band, set()).add(key)
+
+    def remove(self, key, p, q):
+        """Removes the segment pq stored under key, does nothing if it is not present"""
+        for band in self._bands(p, q):
+            keys = self.bands.get(band)
+            if keys is not None:
+                keys.discard(key)
+
+    def query(self, y):
+        """Yields keys of segments that may cross the horizontal line at y"""
+        yield from self.bands.get(self._band(y), ())
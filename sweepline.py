@@ -0,0 +1,158 @@
+"""Sweep-line detection of polygon self-intersections (Shamos-Hoey / Bentley-Ottmann)"""
+
+import heapq
+import math
+
+from sortedcontainers import SortedList
+import point
+
+class _SweepState:
+    """Position of the sweep line, shared by all segments in the status structure,
+    tolerance is the distance under which y coordinates are considered equal"""
+    def __init__(self, tolerance):
+        self.x = -math.inf
+        self.y = -math.inf
+        self.tolerance = tolerance
+
+class _Segment:
+    """Polygon edge oriented from the lexicographically smaller endpoint,
+    segments are ordered by y coordinate at the sweep line and then by slope,
+    which is their order just right of the sweep point"""
+    __slots__ = ("index", "x1", "y1", "x2", "y2", "slope", "sweep")
+
+    def __init__(self, index, p, q, sweep):
+        if (q.x, q.y) < (p.x, p.y):
+            p, q = q, p
+        self.index = index
+        self.x1, self.y1 = p
+        self.x2, self.y2 = q
+        self.slope = (q.y - p.y) / (q.x - p.x) if q.x != p.x else math.inf
+        self.sweep = sweep
+
+    def y_at_sweep(self):
+        if self.x1 == self.x2:
+            # vertical segment passes the sweep point while it is in its range
+            return min(max(self.sweep.y, self.y1), self.y2)
+        return self.y1 + (self.sweep.x - self.x1) * self.slope
+
+    def has_endpoint(self, p):
+        return (self.x1 == p[0] and self.y1 == p[1]) or (self.x2 == p[0] and self.y2 == p[1])
+
+    def __lt__(self, other):
+        dy = self.y_at_sweep() - other.y_at_sweep()
+        tolerance = self.sweep.tolerance
+        if dy < -tolerance:
+            return True
+        if dy > tolerance:
+            return False
+        return (self.slope, self.index) < (other.slope, other.index)
+
+class _Probe(_Segment):
+    """Placeholder passing through the sweep point, lower or higher than all segments through it"""
+    __slots__ = ()
+
+    def __init__(self, sweep, high):
+        self.index = math.inf if high else -math.inf
+        self.slope = math.inf if high else -math.inf
+        self.sweep = sweep
+
+    def y_at_sweep(self):
+        return self.sweep.y
+
+def _segment_intersection(s, t):
+    """Returns the intersection point of two segments or None,
+    collinear overlaps are ignored as they are detected at the endpoints"""
+    dx1 = s.x2 - s.x1
+    dy1 = s.y2 - s.y1
+    dx2 = t.x2 - t.x1
+    dy2 = t.y2 - t.y1
+    denominator = dy2 * dx1 - dx2 * dy1
+    if denominator == 0:
+        return None
+    uA = (dx2 * (s.y1 - t.y1) - dy2 * (s.x1 - t.x1)) / denominator
+    uB = (dx1 * (s.y1 - t.y1) - dy1 * (s.x1 - t.x1)) / denominator
+    if 0 <= uA <= 1 and 0 <= uB <= 1:
+        return (s.x1 + uA * dx1, s.y1 + uA * dy1)
+    return None
+
+def _iter_intersections(polygon):
+    """Yields points where edges of the polygon intersect, each point once,
+    common vertices of two consecutive edges are not intersections"""
+    # repeated consecutive vertices would create edges of zero length
+    vertices = [p for i, p in enumerate(polygon) if not point.point_eq(p, polygon[i - 1])]
+    n = len(vertices)
+    if n < 3:
+        return
+
+    scale = max(max(abs(p.x), abs(p.y)) for p in vertices)
+    sweep = _SweepState(point.EPS * max(1.0, scale))
+    segments = [_Segment(i, vertices[i], vertices[(i + 1) % n], sweep) for i in range(n)]
+    starting = dict() # key is an event point value is a list of segments starting there
+    for segment in segments:
+        starting.setdefault((segment.x1, segment.y1), []).append(segment)
+    events = list({(p.x, p.y) for p in vertices})
+    heapq.heapify(events)
+    scheduled = set(events)
+
+    status = SortedList()
+    low_probe = _Probe(sweep, high=False)
+    high_probe = _Probe(sweep, high=True)
+
+    def schedule(s, t, p):
+        if (s.index - t.index) % n in (1, n - 1):
+            # consecutive edges meet at their common vertex which is already an event
+            return
+        q = _segment_intersection(s, t)
+        if q is not None:
+            # touching at an endpoint should produce exactly the vertex event
+            for endpoint in ((s.x1, s.y1), (s.x2, s.y2), (t.x1, t.y1), (t.x2, t.y2)):
+                if abs(q[0] - endpoint[0]) <= sweep.tolerance and abs(q[1] - endpoint[1]) <= sweep.tolerance:
+                    q = endpoint
+                    break
+        if q is not None and q > p and q not in scheduled:
+            scheduled.add(q)
+            heapq.heappush(events, q)
+
+    while events:
+        p = heapq.heappop(events)
+        sweep.x, sweep.y = p
+
+        # segments ending at p or passing through it are contiguous in the status
+        lo = status.bisect_left(low_probe)
+        hi = status.bisect_right(high_probe)
+        through = list(status[lo:hi])
+        upper = starting.get(p, [])
+
+        involved = through + upper
+        if len(involved) > 1:
+            adjacent = (len(involved) == 2 and involved[0].has_endpoint(p) and involved[1].has_endpoint(p)
+                        and (involved[0].index - involved[1].index) % n in (1, n - 1))
+            if not adjacent:
+                yield point.Point(*p)
+
+        # reinsert segments continuing beyond p, their order is now given by slope
+        del status[lo:hi]
+        continuing = [s for s in through if not (s.x2 == p[0] and s.y2 == p[1])] + upper
+        for segment in continuing:
+            status.add(segment)
+
+        if not continuing:
+            if 0 < lo < len(status):
+                schedule(status[lo - 1], status[lo], p)
+        else:
+            first = status.index(min(continuing))
+            last = first + len(continuing) - 1
+            if first > 0:
+                schedule(status[first - 1], status[first], p)
+            if last + 1 < len(status):
+                schedule(status[last], status[last + 1], p)
+
+def find_intersections(polygon):
+    """Returns a list of all self-intersections of a polygon in O((n + k) log n)"""
+    return list(_iter_intersections(polygon))
+
+def is_simple(polygon):
+    """Checks whether a polygon has no self-intersections, stops at the first one found"""
+    for _ in _iter_intersections(polygon):
+        return False
+    return True
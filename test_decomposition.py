@@ -0,0 +1,23 @@
+import pytest
+
+from decomposition import triangulate_parallel
+from generators import star_polygon, spiral_polygon
+
+def doubled_area(vertices, triangle):
+    (ax, ay), (bx, by), (cx, cy) = (vertices[i] for i in triangle)
+    return (bx - ax) * (cy - ay) - (cx - ax) * (by - ay)
+
+def polygon_area(vertices):
+    return abs(sum(vertices[i - 1].x * vertices[i].y - vertices[i].x * vertices[i - 1].y for i in range(len(vertices)))) / 2
+
+@pytest.mark.parametrize("engine", ["earclipping", "monotone", "auto"])
+@pytest.mark.parametrize("generator", [star_polygon, spiral_polygon])
+def test_duplicate_vertex(engine, generator):
+    vertices = generator(3000, seed=1)
+    vertices.insert(1234, vertices[1234])
+    triangles = triangulate_parallel(vertices, edge_swapping=True, workers=2, pieces=4, min_piece=500, engine=engine)
+    assert len(triangles) == len(vertices) - 2
+    assert all(len(set(triangle)) == 3 for triangle in triangles)
+    assert {i for triangle in triangles for i in triangle} == set(range(len(vertices)))
+    area = sum(abs(doubled_area(vertices, triangle)) for triangle in triangles) / 2
+    assert area == pytest.approx(polygon_area(vertices))
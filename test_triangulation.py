@@ -0,0 +1,80 @@
+import math
+
+import pytest
+
+from decomposition import triangulate_parallel
+from delaunay import TriangleMesh
+from earclipping import triangulate_indices
+from examples import examples_dict
+from generators import star_polygon, spiral_polygon, comb_polygon, random_simple_polygon
+from point import as_points
+from test_decomposition import doubled_area, polygon_area
+
+ENGINES = [("earclipping", False), ("earclipping", True), ("monotone", False), ("auto", False)]
+ENGINE_IDS = ["earclipping", "vectorized", "monotone", "auto"]
+
+def circle_holes(seed, count=7):
+    """Small clockwise rings around the center of the star polygons below"""
+    return [[(250 + 120 * math.cos(a) + 15 * math.cos(t), 250 + 120 * math.sin(a) + 15 * math.sin(t))
+             for t in (2 * math.pi * k / 12 for k in range(12))][::-1]
+            for a in (2 * math.pi * h / count + seed for h in range(count))]
+
+def check(vertices, holes, triangles, edge_swapping):
+    """Checks the count, the area, the orientation and, with edge swapping, the Delaunay condition of the triangles"""
+    points = as_points(vertices) + [p for hole in holes for p in as_points(hole)]
+    assert len(triangles) == len(points) - 2 + 2 * len(holes)
+    assert all(0 <= i < len(points) for triangle in triangles for i in triangle)
+
+    areas = [doubled_area(points, triangle) for triangle in triangles]
+    assert all(area <= 0 for area in areas) or all(area >= 0 for area in areas)
+    expected = polygon_area(as_points(vertices)) - sum(polygon_area(as_points(hole)) for hole in holes)
+    assert sum(abs(area) for area in areas) / 2 == pytest.approx(expected)
+
+    if edge_swapping:
+        mesh = TriangleMesh(points)
+        for triangle in triangles:
+            mesh.add(triangle)
+        assert not [edge for edge in mesh.edges if mesh.is_illegal(*edge)]
+
+@pytest.mark.parametrize("engine, vectorized", ENGINES, ids=ENGINE_IDS)
+@pytest.mark.parametrize("edge_swapping", [False, True])
+@pytest.mark.parametrize("name", [name for name in examples_dict if not name.startswith("inter")])
+def test_examples(name, edge_swapping, engine, vectorized):
+    vertices = examples_dict[name]
+    triangles = triangulate_indices(vertices, edge_swapping=edge_swapping, vectorized=vectorized, engine=engine)
+    check(vertices, [], triangles, edge_swapping)
+
+@pytest.mark.parametrize("engine, vectorized", ENGINES, ids=ENGINE_IDS)
+@pytest.mark.parametrize("edge_swapping", [False, True])
+@pytest.mark.parametrize("generator", [star_polygon, spiral_polygon, comb_polygon, random_simple_polygon])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_generators(seed, generator, edge_swapping, engine, vectorized):
+    vertices = generator(300, seed=seed)
+    triangles = triangulate_indices(vertices, edge_swapping=edge_swapping, vectorized=vectorized, engine=engine)
+    check(vertices, [], triangles, edge_swapping)
+
+@pytest.mark.parametrize("engine, vectorized", ENGINES, ids=ENGINE_IDS)
+@pytest.mark.parametrize("edge_swapping", [False, True])
+@pytest.mark.parametrize("generator", [star_polygon, spiral_polygon])
+@pytest.mark.parametrize("position", [0, 57, 299])
+def test_duplicate_vertices(position, generator, edge_swapping, engine, vectorized):
+    vertices = generator(300, seed=3)
+    vertices.insert(position, vertices[position])
+    triangles = triangulate_indices(vertices, edge_swapping=edge_swapping, vectorized=vectorized, engine=engine)
+    check(vertices, [], triangles, edge_swapping)
+
+@pytest.mark.parametrize("engine, vectorized", ENGINES, ids=ENGINE_IDS)
+@pytest.mark.parametrize("edge_swapping", [False, True])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_holes(seed, edge_swapping, engine, vectorized):
+    vertices = star_polygon(400, seed=seed, min_radius=200, max_radius=240)
+    holes = circle_holes(seed)
+    triangles = triangulate_indices(vertices, edge_swapping=edge_swapping, vectorized=vectorized, holes=holes, engine=engine)
+    check(vertices, holes, triangles, edge_swapping)
+
+@pytest.mark.parametrize("engine", ["earclipping", "monotone"])
+def test_parallel_holes(engine):
+    vertices = star_polygon(4000, seed=4, min_radius=200, max_radius=240)
+    holes = circle_holes(4)
+    triangles = triangulate_parallel(vertices, edge_swapping=True, holes=holes, workers=2, pieces=4, min_piece=500, engine=engine)
+    check(vertices, holes, triangles, True)
@@ -0,0 +1,100 @@
+"""NumPy implementation of the initial classification of polygon vertices"""
+
+import numpy as np
+
+def classify_vertices(xs, ys, chunk_elements=1 << 20):
+    """Classifies all vertices of a polygon at once,
+    xs and ys are sequences or buffers of the coordinates ordered as in earclipping.EarClipping,
+    returns two boolean arrays: reflex (reflex or flat vertices) and ears,
+    the reflex vertices are sorted into tiles, a candidate triangle is tested only against
+    the reflex vertices in the tiles overlapped by its bounding box (in x and y, like spatialindex.UniformGrid),
+    at most about chunk_elements vertex-triangle pairs are tested at once,
+    unlike the predicates of the scalar engine the tests use plain float arithmetic"""
+    coords = np.column_stack((np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)))
+    prev = np.roll(coords, 1, axis=0)
+    nxt = np.roll(coords, -1, axis=0)
+
+    # same formula as EarClipping._orientation(prev, vertex, next)
+    orientation = (prev[:, 0] - nxt[:, 0]) * (coords[:, 1] - nxt[:, 1]) - (coords[:, 0] - nxt[:, 0]) * (prev[:, 1] - nxt[:, 1])
+    reflex = orientation >= 0
+    ears = orientation <= 0
+
+    reflex_points = coords[reflex]
+    candidates = np.flatnonzero(ears)
+    if len(reflex_points) == 0 or len(candidates) == 0:
+        return reflex, ears
+
+    # about one reflex vertex per tile, the tiles are numbered by rows, so the reflex vertices
+    # sorted by their tile numbers give a slice for a range of columns in a row
+    side = int(np.sqrt(len(reflex_points))) + 1
+    low = reflex_points.min(axis=0)
+    size = np.maximum(reflex_points.max(axis=0) - low, 1e-9) / side
+    tiles = _tiles(reflex_points, low, size, side)
+    keys = tiles[:, 1] * side + tiles[:, 0]
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    rx = reflex_points[order, 0]
+    ry = reflex_points[order, 1]
+
+    # tiles of the corners of the bounding boxes of the candidates
+    corners = np.stack((prev[candidates], coords[candidates], nxt[candidates]))
+    first = _tiles(corners.min(axis=0), low, size, side)
+    last = _tiles(corners.max(axis=0), low, size, side)
+
+    # one slice of reflex vertices for every row of every bounding box
+    spans = last[:, 1] - first[:, 1] + 1
+    owners = np.repeat(np.arange(len(candidates)), spans)
+    rows = np.arange(len(owners)) - np.repeat(np.cumsum(spans) - spans, spans) + first[owners, 1]
+    starts = np.searchsorted(keys, rows * side + first[owners, 0], side="left")
+    counts = np.searchsorted(keys, rows * side + last[owners, 0], side="right") - starts
+
+    conflicting = np.zeros(len(candidates), dtype=bool)
+    totals = np.cumsum(counts)
+    bounds = np.concatenate(([0], np.searchsorted(totals, np.arange(chunk_elements, totals[-1], chunk_elements)), [len(counts)]))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        chunk_counts = counts[lo:hi]
+        points = np.repeat(starts[lo:hi] - (np.cumsum(chunk_counts) - chunk_counts), chunk_counts) + np.arange(chunk_counts.sum())
+        triangles = np.repeat(owners[lo:hi], chunk_counts)
+        idx = candidates[triangles]
+        inside = _inside(rx[points], ry[points], prev[idx], coords[idx], nxt[idx])
+        conflicting[triangles[inside]] = True
+    ears[candidates[conflicting]] = False
+    return reflex, ears
+
+def _tiles(points, low, size, side):
+    """Returns the (column, row) tiles of the points, clamped to the grid"""
+    return np.clip(np.floor((points - low) / size), 0, side - 1).astype(np.int64)
+
+def _inside(px, py, v0, v1, v2):
+    """For every i tells whether the point (px[i], py[i]) lies inside the triangle (v0[i], v1[i], v2[i])
+    or on its boundary, the points equal to the triangle vertices are ignored, a degenerate triangle
+    contains the points of its segment, like predicates.point_in_triangle but in floats"""
+    x0, y0 = v0[:, 0], v0[:, 1]
+    x1, y1 = v1[:, 0], v1[:, 1]
+    x2, y2 = v2[:, 0], v2[:, 1]
+
+    dx = px - x2
+    dy = py - y2
+    dy12 = y1 - y2
+    dx21 = x2 - x1
+    dx02 = x0 - x2
+    dy02 = y0 - y2
+    d = dy12 * dx02 + dx21 * dy02
+    s = dy12 * dx + dx21 * dy
+    t = -dy02 * dx + dx02 * dy
+    inside = (s <= 0) & (t <= 0) & np.where(d < 0, s + t >= d, s + t <= d)
+    # the test above accepts a whole quadrant for a degenerate triangle, keep only the points of its segment
+    flat = np.flatnonzero(d == 0)
+    if len(flat):
+        fx0, fy0, fx1, fy1, fx2, fy2 = x0[flat], y0[flat], x1[flat], y1[flat], x2[flat], y2[flat]
+        fpx, fpy = px[flat], py[flat]
+        on_line = (((fx1 - fx0) * (fpy - fy0) == (fy1 - fy0) * (fpx - fx0)) &
+                   ((fx2 - fx0) * (fpy - fy0) == (fy2 - fy0) * (fpx - fx0)))
+        in_box = ((fpx >= np.minimum(np.minimum(fx0, fx1), fx2)) & (fpx <= np.maximum(np.maximum(fx0, fx1), fx2)) &
+                  (fpy >= np.minimum(np.minimum(fy0, fy1), fy2)) & (fpy <= np.maximum(np.maximum(fy0, fy1), fy2)))
+        inside[flat] = on_line & in_box
+
+    inside &= ~((px == x0) & (py == y0))
+    inside &= ~((px == x1) & (py == y1))
+    inside &= ~((px == x2) & (py == y2))
+    return inside